@@ -0,0 +1,349 @@
+##
+## ColorTempFromRGB benchmark
+##  - Measure time & peak memory (RSS) of color temperature calculation for image files
+##  - Measure startup time (cold import & first result) of modules
+##  - Compare results & speed of analysis engines with reference path (accuracy regressions)
+##
+## https://github.com/greentracery/ColorTempFromRGB
+##
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError: # not available on Windows
+    resource = None
+
+CASES = ('reference', 'chunked')
+STARTUP_IMPORTS = ('ColorTempModel', 'IMG2Layers', 'FrameChangeDetector', 'CaptureSupervisor', 'main')
+STARTUP_LIGHT = ('main',) # must be imported (& arguments parsed) without HEAVY_MODULES, -startup fails otherwise
+HEAVY_MODULES = ('cv2', 'PIL', 'numpy', 'tkinter')
+
+# analysis engines compared with reference path (get_rgb_matrix -> get_average_colorvalues -> rgb_normalize -> getColorTempFromRGBN)
+ACCURACY_ENGINES = ('reference', 'cached', 'chunked', 'stack', 'masked', 'planck')
+APPROXIMATE_ENGINES = ('planck',) # other model by design: deviations are reported, not checked
+PLANCK_RESOLUTION = 100 # temperature step (K) of computed model for 'planck' engine
+SYNTHETIC_TEMPS = (1500, 2000, 2700, 3200, 4000, 5000, 5500, 6500, 8000, 10000, 15000, 25000) # K
+SYNTHETIC_SIZE = (480, 640) # height, width of synthetic frames
+
+# run in a fresh python process: import name from modules (or main.py & parse arguments), build model & get first result
+STARTUP_SCRIPT = '''
+import json, sys, time
+t0 = time.perf_counter()
+import modules
+if sys.argv[1] == 'main':
+    import main
+    main.parse_args(['-roi', '0,0,10,10'])
+else:
+    cls = getattr(modules, sys.argv[1])
+t1 = time.perf_counter()
+import_loaded = [m for m in sys.argv[2:] if m in sys.modules]
+ct = modules.ColorTempModel()
+rgbN = ct.rgb_normalize(200, 180, 160)
+ct.getColorTempFromRGBN(rgbN[0], rgbN[1], rgbN[2])
+t2 = time.perf_counter()
+print(json.dumps({
+    'import': sys.argv[1],
+    'import_ms': round((t1 - t0) * 1000, 1),
+    'first_result_ms': round((t2 - t0) * 1000, 1),
+    'import_loaded': import_loaded,
+    'loaded': [m for m in sys.argv[2:] if m in sys.modules],
+}))
+'''
+
+def peak_rss_mb():
+    """ Return peak resident set size of current process, Mb (None if unknown) """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, in kilobytes on Linux
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def run_case(case: str, image: str, mode: str, max_memory: int = None) -> dict:
+    """ Calculate color temperature for image file by selected case, return results & timings
+
+        :param case: 'reference' (load whole image) or 'chunked' (read image by strips)
+        :param image: path to image file
+        :param mode: 'mean' or 'median'
+        :param max_memory: memory limit for strip buffers, bytes (chunked case only)
+
+        return dict
+    """
+    from modules.bbrmodel import ColorTempModel
+    from modules.img2layers import IMG2Layers
+
+    ct = ColorTempModel()
+    img2rgb = IMG2Layers()
+
+    t0 = time.perf_counter()
+    if case == 'chunked':
+        RGB = img2rgb.get_chunked_colorvalues(image, mode, max_memory)
+    else:
+        r, g, b = img2rgb.get_rgb_matrix(img2rgb.img_to_array(image))
+        RGB = img2rgb.get_average_colorvalues([r, g, b], mode)
+    rgbN = ct.rgb_normalize(RGB[0], RGB[1], RGB[2])
+    color_temp, distance = ct.getColorTempFromRGBN(rgbN[0], rgbN[1], rgbN[2])
+    t1 = time.perf_counter()
+
+    return {
+        'case': case,
+        'image': os.path.basename(image),
+        'RGB': [int(v) for v in RGB],
+        'K': color_temp,
+        'distance': distance,
+        'time_ms': round((t1 - t0) * 1000, 1),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+def run_isolated(case: str, image: str, mode: str, max_memory: int = None) -> dict:
+    """ Run case in a separate python process, so peak RSS is not shared between cases """
+    cmd = [sys.executable, os.path.abspath(__file__), '-case', case, '-m', mode, image]
+    if max_memory:
+        cmd += ['-mem', str(max_memory)]
+    process = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    if process.returncode != 0: # e.g. reference case for image over Pillow decompression bomb limit
+        error = (process.stderr.strip().splitlines() or ['failed'])[-1]
+        return {'case': case, 'image': os.path.basename(image), 'error': error}
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+def run_startup(name: str, repeat: int = 5) -> dict:
+    """ Measure cold import of name from modules & time to first color temperature result, 
+        every run in a fresh python process, return best run
+
+        :param name: name to import from modules
+        :param repeat: number of runs
+
+        return dict
+    """
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    runs = []
+    for i in range(repeat):
+        out = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT, name] + list(HEAVY_MODULES), 
+            stdout=subprocess.PIPE, check=True, universal_newlines=True, cwd=cwd).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+    return min(runs, key=lambda r: r['first_result_ms'])
+
+def check_startup(results) -> bool:
+    """ Return True if names of STARTUP_LIGHT were imported without heavy modules (GUI, OpenCV, Pillow, numpy) """
+    passed = True
+    for r in results:
+        if r['import'] in STARTUP_LIGHT and r['import_loaded']:
+            print(f"import {r['import']} loads {','.join(r['import_loaded'])}", file=sys.stderr)
+            passed = False
+    return passed
+
+def print_startup_table(results):
+    """ Print startup results as table """
+    print(f"{'import':<20} {'import ms':>10} {'first result ms':>16}  loaded")
+    for r in results:
+        print(f"{r['import']:<20} {r['import_ms']:>10} {r['first_result_ms']:>16}  {','.join(r['loaded'])}")
+
+def print_table(results):
+    """ Print results as table """
+    print(f"{'case':<10} {'image':<24} {'R,G,B':<16} {'K':>6} {'dist':>5} {'ms':>9} {'peak RSS Mb':>12}")
+    for r in results:
+        if 'error' in r:
+            print(f"{r['case']:<10} {r['image']:<24} {r['error']}")
+            continue
+        rgb = ','.join(str(v) for v in r['RGB'])
+        print(f"{r['case']:<10} {r['image']:<24} {rgb:<16} {r['K']:>6} {r['distance']:>5} {r['time_ms']:>9} {str(r['peak_rss_mb']):>12}")
+
+def get_synthetic_frames(ct, temps = SYNTHETIC_TEMPS, size = SYNTHETIC_SIZE, noise: float = 2.0, seed: int = 0) -> list:
+    """ Return frames filled with blackbody model colors (known color temperature) & gaussian noise 
+
+        :param ct: ColorTempModel
+        :param temps: color temperatures of frames, K
+        :param size: (height, width) of frames
+        :param noise: standard deviation of noise (0..255 scale), 0 for flat frames
+        :param seed: random seed (same frames for every run)
+
+        return list of tuples (name, frame: numpy.array (H, W, 3) uint8, color temperature K)
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    frames = []
+    for temp_K in temps:
+        RGB = ct.rgb_from_normal(*ct.getRGBNFromColorTemp(temp_K))
+        frame = np.empty(size + (3,), dtype=float)
+        frame[:] = RGB
+        if noise > 0:
+            frame += rng.normal(0, noise, frame.shape)
+        frames.append((f'bbr-{temp_K}K', np.clip(np.round(frame), 0, 255).astype(np.uint8), temp_K))
+    return frames
+
+def run_engine(engine: str, frames: list, files: list, mode: str, models: dict) -> list:
+    """ Calculate color temperature for every frame by selected engine
+
+        :param engine: one of ACCURACY_ENGINES
+        :param frames: list of numpy.arrays (H, W, 3) uint8
+        :param files: lossless image files with same pixels as frames (for 'chunked' engine)
+        :param mode: 'mean' or 'median'
+        :param models: dict of ColorTempModel: 'exact' (without cache), 'cached', 'planck'
+
+        return list of tuples (color temperature K, distance)
+    """
+    import numpy as np
+    from modules.img2layers import IMG2Layers
+
+    img2rgb = IMG2Layers()
+    ct = models['exact']
+    if engine == 'stack':
+        # frames of same size are analyzed as one stack, temperatures are found by one batch lookup
+        results = [None] * len(frames)
+        shapes = {}
+        for i, frame in enumerate(frames):
+            shapes.setdefault(frame.shape, []).append(i)
+        for indexes in shapes.values():
+            RGB = img2rgb.get_stack_info(np.stack([frames[i] for i in indexes]), mode)['RGB']
+            temps, distances = ct.getColorTempFromRGBNBatch(ct.rgb_normalize_batch(RGB))
+            for i, temp_K, distance in zip(indexes, temps, distances):
+                results[i] = (int(temp_K), float(distance))
+        return results
+
+    if engine in ('cached', 'planck'):
+        ct = models[engine]
+    results = []
+    for frame, file in zip(frames, files):
+        if engine == 'chunked':
+            RGB = img2rgb.get_chunked_colorvalues(file, mode)
+        elif engine == 'masked':
+            RGB, excluded = img2rgb.get_masked_colorvalues(frame, mode, -1, 256) # thresholds out of range: nothing is excluded
+        else:
+            r, g, b = img2rgb.get_rgb_matrix(frame)
+            RGB = img2rgb.get_average_colorvalues([r, g, b], mode)
+        rgbN = ct.rgb_normalize(RGB[0], RGB[1], RGB[2])
+        results.append(ct.getColorTempFromRGBN(rgbN[0], rgbN[1], rgbN[2]))
+    return results
+
+def run_accuracy(images: list, mode: str, engines = ACCURACY_ENGINES, repeat: int = 3, noise: float = 2.0) -> list:
+    """ Compare engines with reference path on image files & synthetic blackbody frames.
+        Every engine gets same pixels (chunked engine reads lossless copies of frames),
+        time is best of repeated runs over whole sample set, without model construction.
+
+        :param images: paths to image files
+        :param mode: 'mean' or 'median'
+        :param engines: engines to compare (reference is always run)
+        :param repeat: number of timed runs
+        :param noise: noise of synthetic frames (0..255 scale)
+
+        return list of dicts (one per engine & sample set)
+    """
+    from PIL import Image
+    from modules.bbrmodel import ColorTempModel
+    from modules.img2layers import IMG2Layers
+
+    models = {
+        'exact': ColorTempModel(cache_size=0),
+        'cached': ColorTempModel(),
+        'planck': ColorTempModel(resolution=PLANCK_RESOLUTION, cache_size=0) if 'planck' in engines else None,
+    }
+    img2rgb = IMG2Layers()
+    sample_sets = {
+        'images': [(os.path.basename(image), img2rgb.img_to_array(image), None) for image in images],
+        'synthetic': get_synthetic_frames(models['exact'], noise=noise),
+    }
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for set_name, samples in sample_sets.items():
+            if not samples:
+                continue
+            frames = [frame for name, frame, temp_K in samples]
+            files = []
+            for i, frame in enumerate(frames):
+                files.append(os.path.join(tmpdir, f'{set_name}-{i}.png'))
+                Image.fromarray(frame).save(files[-1])
+
+            reference = None
+            for engine in ('reference',) + tuple(e for e in engines if e != 'reference'):
+                times = []
+                for i in range(repeat):
+                    t0 = time.perf_counter()
+                    results = run_engine(engine, frames, files, mode, models)
+                    times.append(time.perf_counter() - t0)
+                if reference is None:
+                    reference, reference_time = results, min(times)
+                temp_errors = [abs(r[0] - ref[0]) for r, ref in zip(results, reference)]
+                distance_errors = [round(abs(r[1] - ref[1]), 2) for r, ref in zip(results, reference)]
+                true_errors = [abs(r[0] - temp_K) for r, (name, frame, temp_K) in zip(results, samples) if temp_K is not None]
+                rows.append({
+                    'engine': engine,
+                    'samples': set_name,
+                    'count': len(results),
+                    'mismatches': sum(1 for t, d in zip(temp_errors, distance_errors) if t or d),
+                    'max_dK': max(temp_errors),
+                    'max_ddist': max(distance_errors),
+                    'max_true_dK': max(true_errors) if true_errors else None,
+                    'ms_per_sample': round(min(times) * 1000 / len(results), 2),
+                    'speedup': round(reference_time / min(times), 2) if min(times) > 0 else None,
+                    'exact': engine not in APPROXIMATE_ENGINES,
+                })
+    return rows
+
+def check_accuracy(rows: list, tolerance: int = 0, distance_tolerance: float = 0) -> bool:
+    """ Mark rows of exact engines with deviations over tolerance as failed, return True if all rows passed 
+
+        :param rows: results of run_accuracy (updated in place: 'status')
+        :param tolerance: max. color temperature deviation from reference, K
+        :param distance_tolerance: max. distance deviation from reference
+    """
+    passed = True
+    for r in rows:
+        if not r['exact']:
+            r['status'] = 'approx'
+        elif r['max_dK'] > tolerance or r['max_ddist'] > distance_tolerance:
+            r['status'] = 'FAIL'
+            passed = False
+        else:
+            r['status'] = 'ok'
+    return passed
+
+def print_accuracy_table(rows):
+    """ Print accuracy results as table """
+    print(f"{'engine':<10} {'samples':<10} {'n':>3} {'diff':>5} {'max dK':>7} {'max ddist':>10} {'max dK true':>12} {'ms/sample':>10} {'speedup':>8}  status")
+    for r in rows:
+        true_dK = '-' if r['max_true_dK'] is None else r['max_true_dK']
+        print(f"{r['engine']:<10} {r['samples']:<10} {r['count']:>3} {r['mismatches']:>5} {r['max_dK']:>7} {r['max_ddist']:>10} {true_dK:>12} {r['ms_per_sample']:>10} {str(r['speedup']):>8}  {r['status']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark color temperature calculation for image files")
+    parser.add_argument("images", nargs="*", help="Image files (default: img/*.jpg)")
+    parser.add_argument("-case", "--case", type=str, choices=CASES, help="Run single case in this process")
+    parser.add_argument("-m", "--mode", type=str, default='mean', help="Mean or median mode for average values")
+    parser.add_argument("-mem", "--maxmemory", type=int, help="Memory limit for strip buffers, bytes (chunked case)")
+    parser.add_argument("-startup", "--startup", action="store_true", help="Measure startup time (cold import & first result)")
+    parser.add_argument("-accuracy", "--accuracy", action="store_true", help="Compare results & speed of analysis engines with reference path")
+    parser.add_argument("-engine", "--engine", type=str, action="append", choices=ACCURACY_ENGINES, help="Engine to compare (may be repeated, default all)")
+    parser.add_argument("-noise", "--noise", type=float, default=2.0, help="Noise of synthetic blackbody frames (0..255 scale, default 2)")
+    parser.add_argument("-tol", "--tolerance", type=int, default=0, help="Max. color temperature deviation from reference, K (default 0)")
+    parser.add_argument("-toldist", "--distancetolerance", type=float, default=0, help="Max. distance deviation from reference (default 0)")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    images = args.images
+    if not images:
+        imgdir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'img')
+        images = [os.path.join(imgdir, f) for f in sorted(os.listdir(imgdir)) if f.endswith('.jpg')]
+
+    if args.startup:
+        results = [run_startup(name) for name in STARTUP_IMPORTS]
+        print_startup_table(results)
+        sys.exit(0 if check_startup(results) else 1)
+    elif args.accuracy:
+        rows = run_accuracy(images, args.mode, args.engine or ACCURACY_ENGINES, noise=args.noise)
+        passed = check_accuracy(rows, args.tolerance, args.distancetolerance)
+        print_accuracy_table(rows)
+        sys.exit(0 if passed else 1)
+    elif args.case:
+        for image in images:
+            print(json.dumps(run_case(args.case, image, args.mode, args.maxmemory)))
+    else:
+        print_table([run_isolated(case, image, args.mode, args.maxmemory) for image in images for case in CASES])
@@ -3,15 +3,48 @@
 ##
 ## https://github.com/greentracery/ColorTempFromRGB
 ##
+## Modules are imported on first access (PEP 562), so e.g. ColorTempModel
+## can be used without importing OpenCV or Pillow.
+##
+
+import importlib
 
 __all__ = (
     "ColorTempModel",
     "IMG2Layers",
     "VideoCapture",
+    "CaptureSupervisor",
     "LogWriter",
+    "FrameChangeDetector",
+    "PlanckModelGenerator",
+    "WhiteBalance",
+    "RegionOfInterest",
+    "AdaptiveScheduler",
+    "FrameOverlay",
+    "App",
 )
 
-from . bbrmodel import ColorTempModel
-from . img2layers import IMG2Layers
-from . capture import VideoCapture
-from . logger import LogWriter
+_modules = {
+    "ColorTempModel": ".bbrmodel",
+    "IMG2Layers": ".img2layers",
+    "VideoCapture": ".capture",
+    "CaptureSupervisor": ".capture",
+    "LogWriter": ".logger",
+    "FrameChangeDetector": ".framediff",
+    "PlanckModelGenerator": ".planck",
+    "WhiteBalance": ".whitebalance",
+    "RegionOfInterest": ".roi",
+    "AdaptiveScheduler": ".scheduler",
+    "FrameOverlay": ".overlay",
+    "App": ".gui",
+}
+
+def __getattr__(name):
+    if name not in _modules:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_modules[name], __name__), name)
+    globals()[name] = value # next access without __getattr__
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
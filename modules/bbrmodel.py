@@ -19,10 +19,14 @@
 ##  #rgb  {00-ff}
 ##
 
+from collections import OrderedDict
 from contextlib import closing
 import os
+import threading
 import numpy as np
 
+from . planck import PlanckModelGenerator
+
 class ColorTempModel():
     """ Blackbody radiation data model (Based on Mitchell Charity's blackbody data model),
         that links parameters such as: 
@@ -36,16 +40,60 @@ class ColorTempModel():
         - or CIE 1964 10 degree color matching functions
         
         property: data_model_file: filename of blackbody data model
+        property: resolution: temperature step (K) of computed model, None for data_model_file (100 K)
+        property: cache_size: max. number of cached lookups (0 to disable cache)
+        property: cache_quantum: quantization step of normalized R,G,B for cache keys
         
         method: getColorTempFromRGBN: Return nearest color temperature for normalized RGB (0-1) using blackbody data model
+        method: find_nearest: Return nearest color temperature for normalized RGB (0-1), without cache
+        method: getColorTempFromRGBNBatch: Return nearest color temperatures for array of normalized RGB (0-1)
+        method: load_data_model: Return blackbody data model from data_model_file
+        method: generate_model: Return blackbody data model computed from Planck's law
+        method: build_index: Build sorted lookup index of model R,G,B (normalized)
+        method: cache_info: Return cache statistics
+        method: cache_clear: Clear cache & statistics
         method: getColorTempFromRGB: Return nearest color temperature for RGB (0-255) using blackbody data model
+        method: getRGBNFromColorTemp: Return normalized RGB (0-1) of model item nearest to color temperature
         method: closest_number: Return number from sequence, closest to target 
         method: rgb_normalize: Return normalized values for R,G,B
+        method: rgb_normalize_batch: Return normalized values for array of R,G,B (0-255)
         method: rgb_from_normal: Return R,G,B (in range 0-255) values from normalized
     """
     data_model_file = r'bbr_color.txt'
+    T_MIN = 1000 # min. temperature of model, K
+    T_MAX = 40000 # max. temperature of model, K
+    SQRT2 = np.sqrt(2)
+    BATCH_ITEMS = 1 << 20 # max. number of (color, model item) distances calculated at once
+    
+    def __init__(self, cache_size: int = 1024, cache_quantum: float = 0.0001, resolution: int = None, cache_dir: str = None):
+        """
+            :param cache_size: max. number of cached lookups, least recently used are evicted (0 to disable cache)
+            :param cache_quantum: quantization step of normalized R,G,B for cache keys 
+                (default 0.0001 is precision of rgb_normalize, so cached results are exact)
+            :param resolution: temperature step (K) of model computed from Planck's law & CIE tables,
+                None to use precomputed data_model_file (100 K step)
+            :param cache_dir: directory for computed models (see PlanckModelGenerator)
+        """
+        self.cache_size = cache_size
+        self.cache_quantum = cache_quantum
+        self.cache = OrderedDict()
+        self.cache_lock = threading.Lock() # model may be shared by capture threads
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.normal_table = None
+        
+        self.resolution = resolution
+        if resolution is None:
+            self.cmfx = self.load_data_model()
+        else:
+            self.cmfx = self.generate_model(resolution, cache_dir)
+        self.build_index()
     
-    def __init__(self):
+    def load_data_model(self) -> dict:
+        """ Return blackbody data model from data_model_file 
+        
+            return dict: {cmf: {temp_K: ((r, g, b), (rn, gn, bn))}}
+        """
         i = 0
         cmfx = {}
         with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', self.data_model_file), "r") as file:
@@ -65,7 +113,42 @@ class ColorTempModel():
                         cmfx[cmf] = {}
                     cmfx[cmf][temp_K] = ((r, g, b), (rn, gn, bn))
                 i += 1
-        self.cmfx = cmfx
+        return cmfx
+    
+    def generate_model(self, resolution: int, cache_dir: str = None) -> dict:
+        """ Return blackbody data model computed from Planck's law (see PlanckModelGenerator) 
+        
+            :param resolution: temperature step, K
+            :param cache_dir: directory for computed models
+            
+            return dict: {cmf: {temp_K: ((r, g, b), (rn, gn, bn))}}
+        """
+        generator = PlanckModelGenerator(cache_dir)
+        cmfx = {}
+        for cmf in generator.CMFS:
+            model = generator.get_model(self.T_MIN, self.T_MAX, resolution, cmf)
+            cmfx[cmf] = {
+                int(temp_K): (tuple(int(v) for v in rgb), tuple(float(v) for v in rgbn))
+                for temp_K, rgb, rgbn in zip(model['K'], model['rgb'], model['rgbn'])
+            }
+        return cmfx
+    
+    def build_index(self):
+        """ Build lookup index of model R,G,B (normalized) for each color matching function:
+            model items sorted by key (bn - rn). For any two colors |key1 - key2| <= sqrt(2) * distance,
+            so only items with keys close to key of target color must be checked.
+        """
+        self.index = {}
+        self.models = {} # model items in temperature order, for batch lookups
+        for cmf, items in self.cmfx.items():
+            temps = np.array(list(items.keys()))
+            rgbn = np.array([item[1] for item in items.values()], dtype=float)
+            order = np.argsort(temps, kind='stable')
+            temps, rgbn = temps[order], rgbn[order]
+            self.models[cmf] = (temps, rgbn)
+            keys = rgbn[:, 2] - rgbn[:, 0]
+            order = np.argsort(keys, kind='stable')
+            self.index[cmf] = (keys[order], rgbn[order], temps[order])
 
     def getColorTempFromRGBN(self, rn: float, gn: float, bn: float, cmf: str = '10deg'):
         """ Return nearest color temperature for RGB (normalized) using blackbody data model 
@@ -80,17 +163,106 @@ class ColorTempModel():
                 distance (0..1)
             )
         """
+        if self.cache_size <= 0:
+            return self.find_nearest(rn, gn, bn, cmf)
+        
+        key = (round(rn / self.cache_quantum), round(gn / self.cache_quantum), round(bn / self.cache_quantum), cmf)
+        with self.cache_lock:
+            result = self.cache.get(key)
+            if result is not None:
+                self.cache.move_to_end(key)
+                self.cache_hits += 1
+                return result
+            self.cache_misses += 1
+        
+        result = self.find_nearest(rn, gn, bn, cmf)
+        
+        with self.cache_lock:
+            self.cache[key] = result
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False) # evict least recently used
+        
+        return result
+    
+    def find_nearest(self, rn: float, gn: float, bn: float, cmf: str = '10deg'):
+        """ Return nearest color temperature for RGB (normalized) using blackbody data model, without cache 
+        
+            :param rn: Red value (normalized)
+            :param gn: Green value (normalized)
+            :param bn: Blue value (normalized)
+            :param cmf: Color matching function ('10deg', '2deg')
+            
+            return tuple (
+                color temperature (K)
+                distance (0..1)
+            )
+        """
+        keys, model_rgbn, temps = self.index[cmf]
         rgb_npa = np.array([rn, gn, bn], dtype=float)
-        temp_distance = {}
-        # calculate distances between [rn, gn, bn] and each model [r, g, b] item:
-        for key, item in self.cmfx[cmf].items():
-            temp_rgb_npa = np.array([item[1][0], item[1][1],item[1][2]], dtype=float)
-            temp_distance[key] = np.linalg.norm(rgb_npa - temp_rgb_npa)
-        # find min.distance & nearest value:
-        min_distance = min(temp_distance.values())
-        min_distance_temp_K = list(filter(lambda k: temp_distance[k] == min_distance, temp_distance))
-        
-        return min_distance_temp_K[0], round(1 - temp_distance[min_distance_temp_K[0]], 2)
+        key = bn - rn
+        # distance to model items next to target key is upper bound of min. distance:
+        pos = int(np.searchsorted(keys, key))
+        near = slice(max(pos - 1, 0), min(pos + 1, len(keys)))
+        max_distance = np.linalg.norm(model_rgbn[near] - rgb_npa, axis=1).min()
+        # calculate distances only for model items with keys in [key - sqrt(2) * max_distance, key + sqrt(2) * max_distance]:
+        delta = self.SQRT2 * max_distance * (1 + 1e-9) + 1e-12
+        lo = int(np.searchsorted(keys, key - delta, side='left'))
+        hi = int(np.searchsorted(keys, key + delta, side='right'))
+        temp_distance = np.linalg.norm(model_rgbn[lo:hi] - rgb_npa, axis=1)
+        # find min.distance & nearest (lowest) temperature:
+        min_distance = temp_distance.min()
+        min_distance_temp_K = temps[lo:hi][temp_distance == min_distance].min()
+        
+        return int(min_distance_temp_K), round(1 - min_distance, 2)
+    
+    def getColorTempFromRGBNBatch(self, rgbn, cmf: str = '10deg') -> tuple:
+        """ Return nearest color temperatures for array of normalized R,G,B using blackbody data model.
+            Same results as getColorTempFromRGBN for every row, repeated colors are calculated once.
+        
+            :param rgbn: numpy.array (N, 3) of normalized R,G,B (0-1)
+            :param cmf: Color matching function ('10deg', '2deg')
+            
+            return tuple (
+                color temperatures (K): numpy.array (N)
+                distances (0..1): numpy.array (N)
+            )
+        """
+        rgbn = np.asarray(rgbn, dtype=float).reshape(-1, 3)
+        temps, model_rgbn = self.models[cmf]
+        colors, inverse = np.unique(rgbn, axis=0, return_inverse=True)
+        
+        color_temps = np.empty(len(colors), dtype=temps.dtype)
+        min_distances = np.empty(len(colors), dtype=float)
+        rows = max(1, self.BATCH_ITEMS // len(temps))
+        for i in range(0, len(colors), rows):
+            temp_distance = np.linalg.norm(colors[i:i + rows, np.newaxis, :] - model_rgbn[np.newaxis, :, :], axis=2)
+            nearest = temp_distance.argmin(axis=1) # first (lowest) temperature for equal distances
+            color_temps[i:i + rows] = temps[nearest]
+            min_distances[i:i + rows] = temp_distance[np.arange(len(nearest)), nearest]
+        
+        inverse = inverse.reshape(-1)
+        return color_temps[inverse], np.round(1 - min_distances, 2)[inverse]
+    
+    def cache_info(self) -> dict:
+        """ Return cache statistics 
+        
+            return dict: hits, misses, size, maxsize
+        """
+        with self.cache_lock:
+            return {
+                'hits': self.cache_hits,
+                'misses': self.cache_misses,
+                'size': len(self.cache),
+                'maxsize': self.cache_size,
+            }
+    
+    def cache_clear(self):
+        """ Clear cache & statistics """
+        with self.cache_lock:
+            self.cache.clear()
+            self.cache_hits = 0
+            self.cache_misses = 0
     
     def getColorTempFromRGB(self, r: int, g: int, b: int, cmf: str = '10deg'):
         """ Return nearest color temperature for RGB using blackbody data model 
@@ -108,6 +280,19 @@ class ColorTempModel():
         
         return self.getColorTempFromRGBN(rn, gn, bn, cmf)
     
+    def getRGBNFromColorTemp(self, temp_K: int, cmf: str = '10deg') -> tuple:
+        """ Return normalized RGB (0-1) of model item nearest to color temperature 
+        
+            :param temp_K: color temperature (K)
+            :param cmf: Color matching function ('10deg', '2deg')
+            
+            return tuple: (rn, gn, bn) normalized RGB (0-1) values
+        """
+        temps, model_rgbn = self.models[cmf]
+        nearest = int(np.abs(temps - temp_K).argmin())
+        
+        return tuple(float(v) for v in model_rgbn[nearest])
+    
     def closest_number(self, numbers, target):
         """ Return number from sequence, closest to target 
         
@@ -134,6 +319,27 @@ class ColorTempModel():
         
         return r, g, b
     
+    def rgb_normalize_batch(self, rgb):
+        """ Return normalized values for array of R,G,B, same as rgb_normalize for every row 
+        
+            :param rgb: numpy.array (N, 3) of R,G,B int values (0-255)
+            
+            return numpy.array (N, 3): normalized RGB (0-1) values
+        """
+        if self.normal_table is None:
+            # normal_table[max_value, value] == round(value * (1 / max_value), 4), rounded like rgb_normalize
+            table = np.zeros((256, 256), dtype=float)
+            table[0] = np.arange(256)
+            for max_value in range(1, 256):
+                k = 1 / max_value
+                table[max_value, :max_value + 1] = [round(value * k, 4) for value in range(max_value + 1)]
+            self.normal_table = table
+        
+        rgb = np.clip(np.asarray(rgb).reshape(-1, 3), 0, 255).astype(int)
+        max_values = rgb.max(axis=1, keepdims=True)
+        
+        return self.normal_table[max_values, rgb]
+    
     def rgb_from_normal(self, rn, gn, bn) -> tuple:
         """ Return R,G,B values from normalized 
         
@@ -9,6 +9,8 @@ import cv2
 import os
 import sys
 import io
+import random
+import threading
 import time
 
 class VideoCapture():
@@ -19,23 +21,32 @@ class VideoCapture():
         method: retrieve: Retrieve videosource
         method: release: Release videosource
     """
+    font = cv2.FONT_HERSHEY_COMPLEX
+    fontsize = 0.6
+    default_fontcolor = (0, 250, 0)
     
-    def __init__(self, video_source = 0):
+    def __init__(self, video_source = 0, open_timeout: float = None, read_timeout: float = None):
         """
             :param videosource: default source (0), url of rtsp stream or filename
+            :param open_timeout: timeout for opening video source, sec. (if supported by OpenCV backend)
+            :param read_timeout: timeout for reading frame, sec. (if supported by OpenCV backend)
         """
         
         # Open the video source
-        self.vid = cv2.VideoCapture(video_source)
+        params = []
+        for prop, timeout in (('CAP_PROP_OPEN_TIMEOUT_MSEC', open_timeout), ('CAP_PROP_READ_TIMEOUT_MSEC', read_timeout)):
+            if timeout is not None and hasattr(cv2, prop):
+                params += [getattr(cv2, prop), int(timeout * 1000)]
+        if params:
+            self.vid = cv2.VideoCapture(video_source, cv2.CAP_ANY, params)
+        else:
+            self.vid = cv2.VideoCapture(video_source)
         time.sleep(1)
         if not self.vid.isOpened():
             raise ValueError("Unable to open video source", video_source)
         # Get video source width and height
         self.width = int(self.vid.get(cv2.CAP_PROP_FRAME_WIDTH))
         self.height = int(self.vid.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        self.font = cv2.FONT_HERSHEY_COMPLEX
-        self.fontsize = 0.6
-        self.default_fontcolor = (0, 250, 0)
     
     def get_frame(self):
         """ Read (grab & retrieve) frame from videosource 
@@ -90,3 +101,252 @@ class VideoCapture():
     # Release the video source when the object is destroyed
     def __del__(self):
         self.release()
+
+
+class CaptureSupervisor():
+    """ Open video source & read frames in background thread, reconnect on failures 
+        with exponential backoff & jitter, keep latest frame & health state
+        
+        property: STATES: health states of video source
+        property: state: current health state
+        property: width, height: size of frames from last opened video source
+        property: reconnects: count of successful reconnections after failures
+        property: failures: count of failures (open/read errors & timeouts)
+        
+        method: start: Start background capture thread
+        method: stop: Stop background capture thread & release videosource
+        method: wait_online: Wait until video source is opened
+        method: get_frame: Return latest frame (non-blocking)
+        method: get_corrected_frame: Return latest frame corrected by frame_filter (non-blocking)
+        method: uptime: Return seconds since video source was (re)opened
+        method: health: Return health state & statistics
+        method: get_backoff: Return pause before next reconnect attempt
+        method: run: Supervisor thread: start capture worker, watch timeouts, reconnect on failures
+        method: capture: Capture worker: open video source & read frames
+        method: read_frames: Read frames from opened video source
+    """
+    STATES = ('connecting', 'online', 'reconnecting', 'stopped', 'stale')
+    font = VideoCapture.font
+    fontsize = VideoCapture.fontsize
+    default_fontcolor = VideoCapture.default_fontcolor
+    
+    def __init__(self, video_source = 0, open_timeout: float = 10, read_timeout: float = 5, 
+                 backoff: float = 1, max_backoff: float = 60, jitter: float = 0.5, 
+                 frame_interval: float = 0.05, capture_factory = None, frame_filter = None):
+        """
+            :param video_source: default source (0), url of rtsp stream or filename
+            :param open_timeout: timeout for opening video source, sec. (enforced by watchdog, even if open blocks)
+            :param read_timeout: max. age of latest frame, sec.; older frame means failed (stale) source
+            :param backoff: pause before first reconnect attempt, sec. (doubled after every failed attempt)
+            :param max_backoff: max. pause between reconnect attempts, sec.
+            :param jitter: random part of pause (0..1) to spread reconnects of many sources
+            :param frame_interval: min. pause between frame reads, sec.
+            :param capture_factory: callable(video_source) returning object with get_frame(), release(), width, height
+                (default VideoCapture), fake sources can be used for testing
+            :param frame_filter: callable(frame) returning corrected copy of frame (e.g. WhiteBalance.apply), 
+                applied to every captured frame in capture thread, see get_corrected_frame
+        """
+        self.video_source = video_source
+        self.open_timeout = open_timeout
+        self.read_timeout = read_timeout
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.frame_interval = frame_interval
+        if capture_factory is None:
+            capture_factory = lambda source: VideoCapture(source, open_timeout, read_timeout)
+        self.capture_factory = capture_factory
+        self.frame_filter = frame_filter
+        
+        self.width = 0
+        self.height = 0
+        self.state = self.STATES[3]
+        self.reconnects = 0
+        self.failures = 0
+        self.last_error = None
+        self.error = None # exception of current capture worker
+        self.online_since = None
+        self.connected = False # True after first successful opening
+        self.generation = 0 # number of current capture worker
+        self.watchdog_interval = min(0.1, read_timeout / 4, open_timeout / 4)
+        
+        self.lock = threading.Lock()
+        self.online_event = threading.Event()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.frame = None
+        self.corrected_frame = None
+        self.frame_time = 0
+    
+    def start(self):
+        """ Start background capture thread """
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.state = self.STATES[0]
+        self.thread = threading.Thread(target=self.run, name=f"capture-{self.video_source}", daemon=True)
+        self.thread.start()
+    
+    def stop(self, timeout: float = None):
+        """ Stop background capture thread & release videosource 
+        
+            :param timeout: max. time to wait for capture thread, sec. (default open_timeout)
+        """
+        self.stop_event.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(self.open_timeout if timeout is None else timeout)
+        self.state = self.STATES[3]
+        self.online_event.clear()
+    
+    def wait_online(self, timeout: float = None) -> bool:
+        """ Wait until video source is opened 
+        
+            :param timeout: max. time to wait, sec. (default open_timeout)
+            
+            return bool: True if video source is online
+        """
+        return self.online_event.wait(self.open_timeout if timeout is None else timeout)
+    
+    def get_frame(self):
+        """ Return latest frame (non-blocking) 
+        
+            return bool status & frame (copy)
+        """
+        with self.lock:
+            if self.frame is None or time.monotonic() - self.frame_time > self.read_timeout:
+                return (False, None)
+            return (True, self.frame.copy())
+    
+    def get_corrected_frame(self):
+        """ Return latest frame corrected by frame_filter (non-blocking), 
+            every captured frame is corrected at capture rate (latest frame if there is no frame_filter)
+        
+            return bool status & frame (copy)
+        """
+        with self.lock:
+            frame = self.frame if self.corrected_frame is None else self.corrected_frame
+            if frame is None or time.monotonic() - self.frame_time > self.read_timeout:
+                return (False, None)
+            return (True, frame.copy())
+    
+    def uptime(self) -> float:
+        """ Return seconds since video source was (re)opened, 0 if source is not online """
+        online_since = self.online_since
+        return time.monotonic() - online_since if online_since is not None else 0
+    
+    def health(self) -> dict:
+        """ Return health state & statistics 
+        
+            return dict: state ('stale' if latest frame is older than read_timeout), uptime, reconnects, failures, last_error
+        """
+        state = self.state
+        if state == self.STATES[1] and time.monotonic() - self.frame_time > self.read_timeout:
+            state = self.STATES[4] # no new frames, watchdog will reconnect on next check
+        return {
+            'state': state,
+            'uptime': round(self.uptime(), 1),
+            'reconnects': self.reconnects,
+            'failures': self.failures,
+            'last_error': self.last_error,
+        }
+    
+    def get_backoff(self, attempt: int) -> float:
+        """ Return pause before next reconnect attempt (exponential backoff with jitter) 
+        
+            :param attempt: number of failed attempts in a row (1..)
+            
+            return float: pause, sec.
+        """
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        return delay * (1 - self.jitter * random.random())
+    
+    def run(self):
+        """ Supervisor thread: start capture worker, watch open & read timeouts, reconnect on failures.
+            Capture calls (open, read) may block, so they run in worker thread: stuck worker is abandoned
+            (its frames are ignored & video source is released when blocking call returns) and replaced.
+        """
+        attempt = 0
+        while not self.stop_event.is_set():
+            with self.lock:
+                self.generation += 1
+                generation = self.generation
+                self.error = None
+            worker = threading.Thread(target=self.capture, args=(generation,), name=f"capture-{self.video_source}-{generation}", daemon=True)
+            started = time.monotonic()
+            worker.start()
+            
+            error = None
+            while error is None and not self.stop_event.wait(self.watchdog_interval):
+                now = time.monotonic()
+                if not worker.is_alive():
+                    error = self.error or ValueError("Video source closed", self.video_source)
+                elif self.online_since is None and now - started > self.open_timeout:
+                    error = TimeoutError("Open timeout", self.video_source)
+                elif self.online_since is not None and now - self.frame_time > self.read_timeout:
+                    self.state = self.STATES[4]
+                    error = TimeoutError("Read timeout", self.video_source)
+                elif self.online_since is not None:
+                    attempt = 0
+            
+            with self.lock:
+                self.generation += 1 # abandon worker: it stops & releases video source as soon as it can
+                self.online_since = None
+                self.online_event.clear()
+            if self.stop_event.is_set():
+                break
+            self.last_error = repr(error)
+            self.failures += 1
+            attempt += 1
+            self.state = self.STATES[2]
+            self.stop_event.wait(self.get_backoff(attempt)) # returns at once when supervisor is stopped
+        
+        self.state = self.STATES[3]
+    
+    def capture(self, generation: int):
+        """ Capture worker: open video source & read frames until failure, stop or abandonment by supervisor
+        
+            :param generation: worker number, worker is abandoned when supervisor increases self.generation
+        """
+        vid = None
+        try:
+            vid = self.capture_factory(self.video_source)
+            with self.lock:
+                if generation != self.generation:
+                    return # open took too long, worker was abandoned
+                self.width, self.height = vid.width, vid.height
+                self.frame_time = time.monotonic() # read timeout is counted from opening
+                self.online_since = self.frame_time
+                if self.connected:
+                    self.reconnects += 1
+                self.connected = True
+                self.state = self.STATES[1]
+                self.online_event.set()
+            self.read_frames(vid, generation)
+        except Exception as e:
+            with self.lock:
+                if generation == self.generation:
+                    self.error = e
+        finally:
+            if vid is not None:
+                vid.release()
+    
+    def read_frames(self, vid, generation: int):
+        """ Read frames from opened video source until failure, stop or abandonment by supervisor
+        
+            :param vid: opened video source
+            :param generation: worker number (see capture)
+        """
+        while not self.stop_event.is_set() and generation == self.generation:
+            t0 = time.monotonic()
+            status, frame = vid.get_frame()
+            if not status:
+                raise ValueError("Can not capture image from video source", self.video_source)
+            frame_filter = self.frame_filter
+            corrected_frame = frame_filter(frame) if frame_filter is not None else None
+            with self.lock:
+                if generation != self.generation:
+                    return # read took too long, worker was abandoned
+                self.frame = frame
+                self.corrected_frame = corrected_frame
+                self.frame_time = time.monotonic()
+            self.stop_event.wait(max(0, self.frame_interval - (time.monotonic() - t0)))
@@ -0,0 +1,85 @@
+##
+## ColorTempFromRGB FrameChangeDetector module
+## - Detect changes between frames using small downsampled thumbnails
+##
+## https://github.com/greentracery/ColorTempFromRGB
+##
+
+import numpy as np
+
+class FrameChangeDetector():
+    """ Compare frame with last analyzed frame by small thumbnail (strided subsample),
+        decide if previous analysis results can be reused
+
+        property: threshold: mean absolute difference between thumbnails (0..255) to treat frame as changed
+        property: thumbnail_size: max. thumbnail width & height, pixels
+        property: computed: count of frames to be analyzed
+        property: skipped: count of frames with reused results
+        property: grayscale: True if last analyzed frame is grayscale (night mode)
+
+        method: get_thumbnail: Return small thumbnail of frame
+        method: is_changed: Return True if frame differs from last analyzed frame
+        method: is_grayscale: Return True if all color layers of frame are equal
+        method: reset: Forget last analyzed frame & reset counters
+    """
+
+    def __init__(self, threshold: float = 2.0, thumbnail_size: int = 64):
+        """
+            :param threshold: mean absolute difference between thumbnails (0..255), 0 to analyze every frame
+            :param thumbnail_size: max. thumbnail width & height, pixels
+        """
+        self.threshold = threshold
+        self.thumbnail_size = thumbnail_size
+        self.reset()
+
+    def reset(self):
+        """ Forget last analyzed frame & reset counters """
+        self.thumbnail = None
+        self.grayscale = False
+        self.computed = 0
+        self.skipped = 0
+
+    def get_thumbnail(self, frame):
+        """ Return small thumbnail of frame (every n-th pixel, without interpolation)
+
+            :param frame: frame (numpy array, H x W x 3)
+
+            return numpy.array (int16)
+        """
+        height, width = frame.shape[:2]
+        step_y = max(1, height // self.thumbnail_size)
+        step_x = max(1, width // self.thumbnail_size)
+
+        return frame[::step_y, ::step_x].astype(np.int16)
+
+    def is_changed(self, frame, force: bool = False) -> bool:
+        """ Return True if frame differs from last analyzed frame (frame must be analyzed),
+            False if results of last analyzed frame can be reused.
+            Night/grayscale flag is updated for analyzed frames.
+
+            :param frame: frame (numpy array, H x W x 3)
+            :param force: frame must be analyzed anyway (e.g. previous results were dropped), count it as changed
+
+            return bool
+        """
+        thumbnail = self.get_thumbnail(frame)
+
+        if (not force and self.threshold > 0 and self.thumbnail is not None and self.thumbnail.shape == thumbnail.shape
+                and np.abs(thumbnail - self.thumbnail).mean() < self.threshold):
+            self.skipped += 1
+            return False
+
+        self.thumbnail = thumbnail
+        # frame with colored thumbnail can't be grayscale, check whole frame only for grayscale thumbnail
+        self.grayscale = self.is_grayscale(thumbnail) and self.is_grayscale(frame)
+        self.computed += 1
+        return True
+
+    def is_grayscale(self, frame) -> bool:
+        """ Return True if all color layers of frame are equal
+
+            :param frame: frame (numpy array, H x W x 3)
+
+            return bool
+        """
+        return bool(np.array_equal(frame[..., 0], frame[..., 1]) and np.array_equal(frame[..., 1], frame[..., 2]))
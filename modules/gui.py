@@ -0,0 +1,589 @@
+##
+## ColorTempFromRGB GUI App module
+##  - Show frames from video source, get snapshots, calculate average color temperature
+##
+## https://github.com/greentracery/ColorTempFromRGB
+##
+
+import cv2
+import datetime
+import os
+import time
+import tkinter
+
+from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageTk
+
+from . bbrmodel import ColorTempModel
+from . img2layers import IMG2Layers
+from . capture import VideoCapture, CaptureSupervisor
+from . logger import LogWriter
+from . framediff import FrameChangeDetector
+from . whitebalance import WhiteBalance
+from . roi import RegionOfInterest
+from . scheduler import AdaptiveScheduler
+from . overlay import FrameOverlay
+
+class App():
+    """ Main GUI App based on TkInter 
+    
+        method: popup_handler: Show popup menu
+        method: popup_close_handler: Close popup menu
+        method: roi_start_handler: Start drawing region of interest (left mouse button pressed)
+        method: roi_drag_handler: Draw region of interest (mouse moved)
+        method: roi_end_handler: Add region of interest (left mouse button released)
+        method: roi_clear_handler: Remove all regions of interest
+        method: clip_rois: Clip regions of interest by frame size, remove regions outside of frame
+        method: init_capture: Open video source (reconnected in background) & set init. params
+        method: set_frame_size: Set zoom & canvas size by frame size of video source, clip regions of interest
+        method: check_capture: Report changes of video source health state
+        method: exit_handler: Exit & close app
+        method: update: Update frame on GUI form
+        method: get_frame_info: Return extended info about frame, include color temperature, brightnes etc
+        method: get_rois_info: Analyze regions of interest of frame, return average R,G,B of all regions
+        method: correct_frame: Return frame with white balance correction by measured color temperature
+        method: add_frame_info: Draw extended info on frame, include color temperature, brightnes etc
+        method: snapshot_handler: Make a snapshot of frame
+    """
+    
+    def __init__(self, window, window_title, video_source = 0, pause: int = 3, quality: int = 90, mode: str = 'mean', logfile = None, diff_threshold: float = 2.0, resolution: int = None, white_balance: bool = False, rois: list = None, exposure_mask: tuple = None, adaptive: bool = False, cpu_budget: float = 0.25, overlay: bool = True):
+        """
+            :param window:
+            :param window_title:
+            :param video_source: default, rtsp or filename
+            :param pause: pause between frames, sec.
+            :param quality: jpeg quality for snapshots
+            :param mode: mean or median mode for average Tk & brightness
+            :param logfile: log file name
+            :param diff_threshold: min. frame change (0..255) to recalculate frame info, 0 to recalculate every frame
+            :param resolution: temperature step (K) of computed blackbody model, None for precomputed 100 K table
+            :param white_balance: show & save frames with white balance correction by measured color temperature
+            :param rois: list of RegionOfInterest to analyze instead of whole frame
+            :param exposure_mask: (low, high) thresholds to exclude underexposed & clipped pixels, None to use all pixels
+            :param adaptive: analyze more often while scene is changing & less often while it is stable (pause is initial value)
+            :param cpu_budget: max. share of one CPU core for analysis in adaptive mode (0..1)
+            :param overlay: draw info banner on shown & saved frames (False to skip rendering)
+        """
+        self.window = window
+        self.window.title(window_title)
+        self.window.protocol("WM_DELETE_WINDOW", self.exit_handler)
+        
+        self.w = self.window.winfo_screenwidth() - 30 # screen width
+        self.h = self.window.winfo_screenheight() - 30 #screen height
+        
+        self.video_source = video_source
+        self.video2screen = False
+        self.vid = None
+        self.vid_state = None
+        self.zoom = 1
+        self.canvas = None
+
+        self.pause = pause
+        self.quality = quality
+        self.mode = mode
+        if adaptive:
+            self.scheduler = AdaptiveScheduler(pause, min(0.5, pause), max(pause, 30), cpu_budget)
+        else:
+            self.scheduler = AdaptiveScheduler(pause, cpu_budget=0) # fixed pause
+        
+        self.ct = ColorTempModel(resolution=resolution)
+        self.img2rgb = IMG2Layers()
+        self.detector = FrameChangeDetector(diff_threshold)
+        self.wb = WhiteBalance(self.ct) if white_balance else None
+        self.rois = list(rois) if rois else []
+        self.roi_info = []
+        self.rois_outside = False # all regions are outside of frame, whole frame is analyzed
+        self.roi_start = None
+        self.exposure_mask = exposure_mask
+        self.excluded = 0
+        self.frame_info = None
+        self.overlay = FrameOverlay(VideoCapture.font, VideoCapture.fontsize, VideoCapture.default_fontcolor) if overlay else None
+        
+        if logfile is not None:
+            self.lw = LogWriter(logfile)
+        else:
+            self.lw = None
+        
+        _msg = f"OpenCV version: {cv2.__version__}"
+        print(_msg)
+        if self.lw:
+            self.lw.log_info(_msg)
+        
+        self.init_capture()
+        
+        # Create a canvas that can fit the above video source size
+        self.canvas = tkinter.Canvas(window, width = int(self.vid.width / self.zoom), height = int(self.vid.height / self.zoom))
+        self.canvas.pack()
+        
+        # Popup menu available by mouse right button click
+        self.canvas.bind("<Button-3>", self.popup_handler)
+        self.popup_menu = tkinter.Menu(tearoff=0)
+        self.popup_menu.add_command(label="Settings", command=self.settings_handler)
+        self.popup_menu.add_command(label="Snapshot", command=self.snapshot_handler)
+        self.popup_menu.add_command(label="Clear ROI", command=self.roi_clear_handler)
+        self.popup_menu.add_command(label="Close", command=self.popup_close_handler)
+        self.popup_menu.add_separator()
+        self.popup_menu.add_command(label="Exit", command=self.exit_handler)
+        
+        # Regions of interest are drawn by left mouse button
+        self.canvas.bind("<ButtonPress-1>", self.roi_start_handler)
+        self.canvas.bind("<B1-Motion>", self.roi_drag_handler)
+        self.canvas.bind("<ButtonRelease-1>", self.roi_end_handler)
+        
+        # Button that lets the user take a snapshot
+        self.btn_snapshot=tkinter.Button(window, text="Snapshot", width=40, command=self.snapshot_handler)
+        self.btn_snapshot.pack(anchor=tkinter.E, expand=True)
+        
+        # Exit button
+        self.btn_exit=tkinter.Button(window, text="Exit", width=40, command=self.exit_handler)
+        self.btn_exit.pack(anchor=tkinter.E, expand=True)
+
+        # After it is called once, the update method will be automatically called every delay milliseconds
+        self.delay = 50
+        self.update()
+
+        self.window.mainloop()
+    
+    def popup_handler(self, event):
+        """ Show popup menu
+            
+            :param event:
+        """
+        global x, y
+        x = event.x
+        y = event.y
+        self.popup_menu.post(event.x_root, event.y_root)
+    
+    def popup_close_handler(self):
+        """ Close popup menu """
+        self.popup_menu.unpost()
+    
+    def roi_start_handler(self, event):
+        """ Start drawing region of interest (left mouse button pressed)
+            
+            :param event:
+        """
+        self.roi_start = (event.x, event.y)
+        self.canvas.delete('roi_drag')
+        self.canvas.create_rectangle(event.x, event.y, event.x, event.y, outline='#00fa00', tags='roi_drag')
+    
+    def roi_drag_handler(self, event):
+        """ Draw region of interest (mouse moved)
+            
+            :param event:
+        """
+        if self.roi_start is not None:
+            self.canvas.coords('roi_drag', self.roi_start[0], self.roi_start[1], event.x, event.y)
+    
+    def roi_end_handler(self, event):
+        """ Add region of interest (left mouse button released)
+            
+            :param event:
+        """
+        if self.roi_start is None:
+            return
+        x0, y0 = self.roi_start
+        self.roi_start = None
+        self.canvas.delete('roi_drag')
+        try:
+            # canvas coordinates -> frame coordinates
+            roi = RegionOfInterest.from_corners(int(x0 * self.zoom), int(y0 * self.zoom), int(event.x * self.zoom), int(event.y * self.zoom))
+        except ValueError:
+            return # click without drag
+        if self.vid is not None and self.vid.width and self.vid.height:
+            roi = roi.clip(self.vid.width, self.vid.height) # mouse may be released outside of canvas
+        if roi is None:
+            return
+        self.rois.append(roi)
+        self.frame_info = None # recalculate on next frame
+        _msg = f"ROI #{len(self.rois)} added: {roi}"
+        print(_msg)
+        if self.lw:
+            self.lw.log_info(_msg)
+    
+    def roi_clear_handler(self):
+        """ Remove all regions of interest """
+        self.rois = []
+        self.roi_info = []
+        self.frame_info = None # recalculate on next frame
+    
+    def clip_rois(self):
+        """ Clip regions of interest by frame size, remove regions outside of frame """
+        rois = []
+        for roi in self.rois:
+            clipped = roi.clip(self.vid.width, self.vid.height)
+            if clipped is None or (clipped.width, clipped.height) != (roi.width, roi.height):
+                warn_msg = f'ROI {roi} is outside of frame {self.vid.width}x{self.vid.height}, ' + (f'clipped to {clipped}' if clipped else 'removed')
+                print(warn_msg)
+                if self.lw:
+                    self.lw.log_warning(warn_msg)
+            if clipped is not None:
+                rois.append(clipped)
+        self.rois = rois
+        self.roi_info = []
+        self.frame_info = None # recalculate on next frame
+    
+    def settings_handler(self):
+        self.settings_window = tkinter.Toplevel()
+        self.settings_window.title("Settings")
+        self.settings_window.geometry("250x200")
+        self.settings_window.protocol("WM_DELETE_WINDOW", lambda: self.dismiss_settings(self.settings_window))
+        self.settings_window.label = tkinter.Label(self.settings_window, text="Set new videosource (0 to default)")
+        self.settings_window.label.pack(anchor=tkinter.CENTER,  padx=8, pady=8)
+        # Text field fo new video source (rtsp stream or filename, "0" to default)
+        self.settings_window.vsource = tkinter.Entry(self.settings_window)
+        self.settings_window.vsource.pack(anchor=tkinter.N, expand=True, padx=8, pady=8)
+        # Button "save settings"
+        self.settings_window.btn = tkinter.Button(self.settings_window, text="Save Settings", width=40, command=self.save_settings_handler)
+        self.settings_window.btn.pack(anchor=tkinter.E, expand=True, padx=8, pady=8)
+        self.settings_window.grab_set()
+        self.settings_window.focus_set()
+        self.settings_window.wait_window()
+    
+    def dismiss_settings(self, window):
+        window.grab_release() 
+        window.destroy()
+    
+    def save_settings_handler(self):
+        vsource = self.settings_window.vsource.get()
+        self.dismiss_settings(self.settings_window)
+        
+        vsource = vsource.strip()
+        if len(vsource) == 0:
+            _msg = f"New video source is empty!"
+            print(_msg)
+            if self.lw:
+                self.lw.log_warnint(_msg)
+            return
+        
+        _msg = f"Try to open new video source: {vsource}"
+        print(_msg)
+        if self.lw:
+            self.lw.log_info(_msg)
+        
+        if vsource.isdigit():
+            vsource = int(vsource)
+        
+        if vsource == self.video_source:
+            _msg = f"Video source was not changed!"
+            print(_msg)
+            if self.lw:
+                self.lw.log_warnint(_msg)
+            return
+        
+        try:
+            self.video_source = vsource
+            self.init_capture(exit_on_error=False)
+        except Exception as e:
+            print(e)
+            if self.lw:
+                self.lw.log_error(repr(e))
+    
+    def init_capture(self, exit_on_error: bool = True):
+        """ Open video source (reconnected in background) & set init. params 
+        
+            :param exit_on_error: Exit app if video source can not be opened (wait until it's online), 
+                else open it in background without blocking GUI (frame size is set by check_capture when it's online)
+        """
+        try:
+            if self.vid is not None:
+                self.vid.stop(1)
+            # open video source (by default this will try to open the computer webcam),
+            # white balance correction (by last measured color temperature) is applied to every captured frame
+            self.vid = CaptureSupervisor(self.video_source, frame_filter=self.wb.apply if self.wb else None)
+            self.vid.start()
+            self.vid_state = None # state of new video source is reported by check_capture
+            if not exit_on_error:
+                info_msg = f'Opening video source {self.video_source} in background'
+                print(info_msg)
+                if self.lw:
+                    self.lw.log_info(info_msg)
+                return
+            if not self.vid.wait_online():
+                raise ValueError("Unable to open video source", self.video_source, self.vid.last_error)
+            
+            self.set_frame_size()
+            
+            # show video source info in console:
+            info_msg = f'Source:{self.video_source},  width:{self.vid.width}, height:{self.vid.height}, every {self.pause} sec.'
+            print(info_msg)
+            if self.lw:
+                self.lw.log_info(info_msg)
+            
+        except Exception as e:
+            print(e)
+            if self.lw:
+                self.lw.log_error(e)
+            self.exit_handler()
+    
+    def set_frame_size(self):
+        """ Set zoom & canvas size by frame size of video source, clip regions of interest """
+        zoom_x = self.vid.width / self.w if self.vid.width > self.w else 1
+        zoom_y = self.vid.height / self.h if self.vid.height > self.h else 1
+        
+        self.zoom = max(zoom_x, zoom_y)
+        if self.canvas is not None:
+            self.canvas.config(width = int(self.vid.width / self.zoom), height = int(self.vid.height / self.zoom))
+        self.clip_rois()
+    
+    def exit_handler(self):
+        """ Exit & close app """
+        if self.vid is not None:
+            self.vid.stop(1)
+        self.window.destroy()  # close window & app
+        print("Bye!")
+    
+    def update(self):
+        """ Update frame on GUI form """
+        
+        dt = datetime.datetime.now()
+        
+        self.check_capture(dt)
+        
+        if self.scheduler.due(): # update frame every {pause} sec. (or by adaptive schedule)
+            
+            # Get latest frame from the video source (frames are read & reconnected in background)
+            status, frame = self.vid.get_frame()
+            
+            if status:
+                
+                t_start = time.perf_counter()
+                self.RGB, self.rgbN, self.color_temp, self.distance, self.brightness = self.get_frame_info(frame)
+                self.scheduler.record(self.color_temp, self.brightness, time.perf_counter() - t_start)
+                
+                frame = self.correct_frame(frame)
+                if self.overlay:
+                    frame = self.add_frame_info(frame, dt)
+                
+                # show frame info in console:
+                info_msg = f'Average R,G,B = {self.RGB[0]}, {self.RGB[1]}, {self.RGB[2]} ({self.rgbN[0]}, {self.rgbN[1]}, {self.rgbN[2]})'
+                print(f'{dt.strftime("%d.%m.%Y %H:%M:%S")} {info_msg}')
+                if self.lw:
+                    self.lw.log_info(info_msg)
+                info_msg = f'Average color temperature {self.color_temp} K ({self.distance}), brightness {self.brightness}% {self.imgmode}'
+                if self.exposure_mask:
+                    info_msg += f', excluded (clipped/underexposed) {round(self.excluded * 100, 1)}% of pixels'
+                print(f'{dt.strftime("%d.%m.%Y %H:%M:%S")} {info_msg}')
+                if self.lw:
+                    self.lw.log_info(info_msg)
+                cache_info = self.ct.cache_info()
+                info_msg = f'Frames computed: {self.detector.computed}, skipped (not changed): {self.detector.skipped}, model cache hits: {cache_info["hits"]}, misses: {cache_info["misses"]}'
+                print(f'{dt.strftime("%d.%m.%Y %H:%M:%S")} {info_msg}')
+                if self.lw:
+                    self.lw.log_info(info_msg)
+                metrics = self.scheduler.metrics()
+                info_msg = f'Analysis every {metrics["interval"]} sec., CPU share {round(metrics["cpu_share"] * 100, 2)}%, decisions: {metrics["decisions"]}'
+                print(f'{dt.strftime("%d.%m.%Y %H:%M:%S")} {info_msg}')
+                if self.lw:
+                    self.lw.log_info(info_msg)
+            
+                image = Image.fromarray(frame)
+                # resize frame to canvas size:
+                if self.zoom > 1:
+                    image = image.resize((int(self.vid.width / self.zoom), int(self.vid.height / self.zoom)))
+                
+                self.photo = ImageTk.PhotoImage(image)
+                self.canvas.create_image(0, 0, image = self.photo, anchor = tkinter.NW)
+                self.canvas.tag_raise('roi_drag') # keep region being drawn over frame
+        
+        self.window.after(self.delay, self.update)
+    
+    def check_capture(self, dt):
+        """ Report changes of video source health state 
+        
+            :param dt: datetime
+        """
+        health = self.vid.health()
+        if health['state'] == self.vid_state:
+            return
+        self.vid_state = health['state']
+        
+        if self.vid_state == 'online':
+            self.set_frame_size() # source may be (re)opened with other resolution
+            info_msg = f'Video source {self.video_source} online, width:{self.vid.width}, height:{self.vid.height}, reconnects: {health["reconnects"]}'
+            print(f'{dt.strftime("%d.%m.%Y %H:%M:%S")} {info_msg}')
+            if self.lw:
+                self.lw.log_info(info_msg)
+        elif self.vid_state == 'stale':
+            warn_msg = f'No new frames from video source {self.video_source} for {self.vid.read_timeout} sec.'
+            print(f'{dt.strftime("%d.%m.%Y %H:%M:%S")} {warn_msg}')
+            if self.lw:
+                self.lw.log_warning(warn_msg)
+        elif self.vid_state == 'reconnecting':
+            warn_msg = f'Can not capture image from camera ({health["last_error"]}), reconnecting'
+            print(f'{dt.strftime("%d.%m.%Y %H:%M:%S")} {warn_msg}')
+            if self.lw:
+                self.lw.log_warning(warn_msg)
+    
+    def get_frame_info(self, frame):
+        """ Return extended info about frame, include color temperature, brightnes etc
+            
+            :param frame: frame from video source (numpy array)
+            
+            return: tuple(
+                RGB: list[R,G,B]: R,G,B values 
+                rgbN: list[R,G,B]: R,G,B values (normalized)
+                color_temp: int: average color temperature
+                distance: float: accuracy (0..1)
+                brightness: int: average brightness (0..100%)
+            )
+        """
+        if not self.detector.is_changed(frame, force=self.frame_info is None):
+            return self.frame_info # scene not changed, reuse previous results
+        
+        RGB = self.get_rois_info(frame) if self.rois else None # None if regions are outside of frame
+        if RGB is None and self.exposure_mask:
+            RGB, self.excluded = self.img2rgb.get_masked_colorvalues(frame, self.mode, *self.exposure_mask)
+        elif RGB is None:
+            r,g,b = self.img2rgb.get_rgb_matrix(frame) 
+            RGB = self.img2rgb.get_average_colorvalues([r, g, b], self.mode)
+        
+        brightness = self.img2rgb.get_average_brightness(RGB)
+        
+        rgbN = self.ct.rgb_normalize(RGB[0], RGB[1], RGB[2]) # normalized in [0..1]
+        
+        color_temp, distance = self.ct.getColorTempFromRGBN(rgbN[0], rgbN[1], rgbN[2])
+        
+        if self.detector.grayscale:
+            self.imgmode = '(Night/grayscale mode)'
+        else:
+            self.imgmode = '(RGB mode)'
+        
+        self.frame_info = RGB, rgbN, color_temp, distance, brightness
+        return self.frame_info
+    
+    def get_rois_info(self, frame):
+        """ Analyze regions of interest of frame (numpy views, without copy of frame),
+            fill self.roi_info with color temperature, brightness etc for each region
+            
+            :param frame: frame from video source (numpy array)
+            
+            return: list[R,G,B]: average R,G,B values of all regions (weighted by region size), 
+                None if all regions are outside of frame (e.g. after switching to lower resolution source)
+        """
+        self.roi_info = []
+        sums = [0, 0, 0]
+        pixels = 0
+        excluded = 0
+        for roi in self.rois:
+            view = roi.get_view(frame)
+            size = view.shape[0] * view.shape[1]
+            if size == 0:
+                self.roi_info.append(None) # region is outside of frame
+                continue
+            
+            if self.exposure_mask:
+                RGB, roi_excluded = self.img2rgb.get_masked_colorvalues(view, self.mode, *self.exposure_mask)
+                excluded += roi_excluded * size
+            else:
+                RGB = [int(v) for v in self.img2rgb.get_stack_colorvalues(view[None], self.mode)[0]]
+            rgbN = self.ct.rgb_normalize(RGB[0], RGB[1], RGB[2])
+            color_temp, distance = self.ct.getColorTempFromRGBN(rgbN[0], rgbN[1], rgbN[2])
+            self.roi_info.append({
+                'RGB': RGB,
+                'color_temp': color_temp,
+                'distance': distance,
+                'brightness': self.img2rgb.get_average_brightness(RGB),
+            })
+            
+            sums = [s + v * size for s, v in zip(sums, RGB)]
+            pixels += size
+        
+        if pixels == 0:
+            if not self.rois_outside:
+                warn_msg = f'Regions of interest are outside of frame {frame.shape[1]}x{frame.shape[0]}, whole frame is analyzed'
+                print(warn_msg)
+                if self.lw:
+                    self.lw.log_warning(warn_msg)
+            self.rois_outside = True
+            return None
+        
+        self.rois_outside = False
+        self.excluded = excluded / pixels
+        return [round(s / pixels) for s in sums]
+    
+    def correct_frame(self, frame):
+        """ Return frame with white balance correction by last measured color temperature 
+            (frame is returned unchanged if correction is off or frame is grayscale).
+            Lookup tables are shared with capture thread, so all next captured frames 
+            are corrected by this temperature too (see CaptureSupervisor.get_corrected_frame)
+            
+            :param frame: frame from video source (numpy array)
+            
+            return frame (numpy array)
+        """
+        if self.wb is None or not hasattr(self, 'color_temp'):
+            return frame
+        self.wb.set_temperature(None if self.detector.grayscale else self.color_temp) # lookup tables are rebuilt only on change
+        return self.wb.apply(frame, inplace=True)
+    
+    def add_frame_info(self, frame, dt):
+        """ Draw extended info on frame, include color temperature, brightnes etc
+            
+            :param frame: frame from video source (numpy array)
+            :param dt: datetime
+            
+            return frame: frame (numpy array) with extended info 
+        """
+        
+        # restore R,G,B from normalized values
+        RGBN = self.ct.rgb_from_normal(self.rgbN[0], self.rgbN[1], self.rgbN[2]) 
+        # add info about frame (only changed lines are rendered again)
+        self.overlay.set_lines([
+            f'{dt.strftime("%d.%m.%Y %H:%M:%S")}',
+            f"width:{self.vid.width}, height:{self.vid.height} {self.imgmode}",
+            f"Average R,G,B = {self.RGB[0]}, {self.RGB[1]}, {self.RGB[2]} ({self.rgbN[0]}, {self.rgbN[1]}, {self.rgbN[2]})",
+            f"Average color temperature {self.color_temp} K ({self.distance}), brightness {self.brightness}%",
+        ])
+        self.overlay.set_swatches([
+            (self.RGB[0], self.RGB[1], self.RGB[2]), # src. average color
+            (RGBN[0], RGBN[1], RGBN[2]), # color from normalized values
+        ])
+        self.overlay.apply(frame)
+        # regions of interest with their own color temperature & brightness
+        for i, (roi, info) in enumerate(zip(self.rois, self.roi_info)):
+            cv2.rectangle(
+                frame, 
+                (roi.x, roi.y),
+                (roi.x + roi.width, roi.y + roi.height),
+                self.vid.default_fontcolor,
+                1
+            )
+            if info is not None:
+                cv2.putText(
+                    frame, 
+                    f"#{i + 1} {info['color_temp']} K ({info['distance']}), {info['brightness']}%", 
+                    (roi.x + 5, roi.y + 20), 
+                    self.vid.font, 
+                    self.vid.fontsize, 
+                    self.vid.default_fontcolor, 
+                    1
+                )
+        return frame
+        
+    def snapshot_handler(self):
+        """ Make a snapshot of frame """
+        
+        # Check filepath
+        imgdir = 'snapshots'
+        target_path = os.path.join(os.getcwd(), imgdir)
+        if not os.path.exists(target_path):
+            os.makedirs(target_path)
+        
+        # Get a frame from the video source (with white balance correction, if it's on)
+        status, frame = self.vid.get_corrected_frame()
+
+        if status:
+            dt = datetime.datetime.now()
+            
+            if self.overlay:
+                frame = self.add_frame_info(frame, dt)
+            
+            # set encode param
+            encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), self.quality]
+            # frames are R,G,B, OpenCV writes B,G,R: one conversion, compressed & saved into file at once
+            filename = os.path.join(target_path, f'frame-{dt.strftime("%d-%m-%Y-%H-%M-%S")}.jpg')
+            cv2.imwrite(filename, cv2.cvtColor(frame, cv2.COLOR_RGB2BGR), encode_param)
+            
+            print(f"{filename} saved!")
+            if self.lw:
+                    self.lw.log_info(f"{filename} saved!")
@@ -5,9 +5,10 @@
 ## https://github.com/greentracery/ColorTempFromRGB
 ##
 
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw, ImageFile, ImageFont
 import io
 import os
+import threading
 import numpy as np
 
 class IMG2Layers():
@@ -23,8 +24,36 @@ class IMG2Layers():
         method: get_mean_colorvalues: Return mean value for all pixels for each color layer
         method: get_median_colorvalues: Return median value for all pixels for each color layer
         method: get_average_brightness: Return average image brightness in [0..100] range
+        method: get_chunked_colorvalues: Return average value for each color layer (R,G,B) of image file, read by strips
+        method: open_image: Return lazily opened image file without Pillow decompression bomb check
+        method: get_strip_bands: Return horizontal bands of image with tiles to decode each band separately
+        method: get_full_image: Return loaded image for formats without strips (JPEG at reduced scale if too large)
+        method: add_image_histograms: Add color values of loaded image into running per-layer histograms, strip by strip
+        method: make_tile: Return Pillow tile descriptor for current Pillow version
+        method: get_chunk_rows: Return number of image rows per strip for given memory limit
+        method: add_chunk_histograms: Add color values of strip into running per-layer histograms
+        method: get_histogram_colorvalues: Return average (mean or median) value for each color layer from histograms
+        method: get_stack_info: Return mean & median color values, brightness & grayscale flags for stack of frames
+        method: get_stack_colorvalues: Return average (mean or median) color values for each frame of stack
+        method: get_stack_histograms: Return histograms for each frame & color layer of stack
+        method: get_histogram_means: Return mean values from histograms (vectorized)
+        method: iter_stack_chunks: Return iterator over stack of frames in chunks (N, H, W, 3)
+        method: get_histogram_medians: Return median values from histograms (vectorized)
+        method: get_stack_grayscale: Return grayscale flags for each frame of stack
+        method: get_masked_colorvalues: Return average color values of frame without clipped & underexposed pixels
+        method: add_masked_histograms: Add color values of strip into running histograms by pixel exposure
     """
     MODES = ('mean', 'median')
+    image_open_lock = threading.Lock() # Image.MAX_IMAGE_PIXELS is changed while image is opened by open_image
+    CHUNK_MEMORY = 64 * 1024 * 1024 # default memory limit for strip buffers, bytes
+    CHUNK_ROW_BYTES = 8 # bytes per pixel used by strip buffers: crop (3) + convert (3) + layer copy (1) + reserve
+    CHUNK_MAX_PIXELS = 1 << 34 # max. image size (width * height) for get_chunked_colorvalues, pixels
+    STACK_CHUNK = 32 # default number of frames processed at once by get_stack_info
+    STACK_BUFFER_ITEMS = 1 << 23 # max. number of pixel values compared at once by get_stack_grayscale
+    STACK_EXACT_COUNT = 1 << 24 # max. frame size (pixels) for cv2.calcHist, float32 counts are exact below
+    MASK_LOW = 10 # pixels with all color values <= MASK_LOW are underexposed
+    MASK_HIGH = 255 # pixels with any color value >= MASK_HIGH are clipped (saturated)
+    MASK_ROW_BYTES = 16 # bytes per pixel used by strip buffers of get_masked_colorvalues
     
     def img_from_array(self, img):
         """ Return Pilow Image from numpy array 
@@ -176,3 +205,438 @@ class IMG2Layers():
             return int: brightness in [0..100] range
         """
         return int(max(average_layer_values) * 100 / 255)
+    
+    def get_chunked_colorvalues(self, img_filename, mode: str, max_memory: int = None, max_pixels: int = None) -> list:
+        """ Return average value for each color layer (R,G,B) of image file, read by horizontal strips.
+            Every strip is decoded separately & folded into running per-layer histograms,
+            so peak memory is bounded by max_memory, not by image size:
+            - uncompressed TIFF (strips or tiles), BMP, PPM, TGA & other raw formats: only strips being read are decoded
+            - JPEG: decoded at reduced scale (DCT scaling 1/2..1/8, see Image.draft) if whole image doesn't fit max_memory,
+              results are average of 8x8 blocks then (mean is almost the same, median is approximate)
+            - other formats (PNG, compressed TIFF, WebP etc): whole image is decoded once, 
+              only images up to Image.MAX_IMAGE_PIXELS (Pillow decompression bomb limit)
+        
+            :param img_filename: path to image file
+            :param mode: 'mean' or 'median'
+            :param max_memory: memory limit for strip buffers, bytes (default CHUNK_MEMORY)
+            :param max_pixels: max. image size (width * height) for strip decoding (default CHUNK_MAX_PIXELS)
+            
+            return list of color layer's average values
+        """
+        if max_memory is None:
+            max_memory = self.CHUNK_MEMORY
+        if max_pixels is None:
+            max_pixels = self.CHUNK_MAX_PIXELS
+        
+        histograms = np.zeros((3, 256), dtype=np.int64)
+        with self.open_image(img_filename) as img:
+            self.width, self.height = img.size
+            if self.width * self.height > max_pixels:
+                raise Exception ("Image is too large", self.width, self.height, max_pixels)
+            if img.mode == 'L':
+                raise Exception ("Grayscale mode")
+            
+            rows = self.get_chunk_rows(self.width, max_memory)
+            bands = self.get_strip_bands(img, rows)
+            if bands is None:
+                self.add_image_histograms(histograms, self.get_full_image(img, max_memory), rows)
+        
+        try:
+            for top, bottom, tiles in bands or []:
+                # file is opened again for every strip, only tiles of strip are decoded into image of strip size
+                with self.open_image(img_filename) as strip:
+                    strip.tile = tiles
+                    strip._size = (self.width, bottom - top)
+                    if hasattr(strip, '_tile_size'):
+                        strip._tile_size = strip._size # TIFF image memory size (Pillow >= 11)
+                    if strip.mode != 'RGB':
+                        strip = strip.convert('RGB')
+                    self.add_chunk_histograms(histograms, np.asarray(strip))
+        except Exception:
+            # strip decoding depends on Pillow internals (tiles, image size), decode whole image if they don't fit
+            histograms[:] = 0
+            with self.open_image(img_filename) as img:
+                self.add_image_histograms(histograms, self.get_full_image(img, max_memory), rows)
+        
+        return self.get_histogram_colorvalues(histograms, mode)
+    
+    def open_image(self, img_filename):
+        """ Return lazily opened image file without Pillow decompression bomb check (image size is checked by caller)
+        
+            :param img_filename: path to image file
+            
+            return Pillow Image (not loaded)
+        """
+        # Pillow checks size of image in Image.open only, by module-level limit
+        with self.image_open_lock:
+            max_image_pixels = Image.MAX_IMAGE_PIXELS
+            Image.MAX_IMAGE_PIXELS = None
+            try:
+                return Image.open(img_filename)
+            finally:
+                Image.MAX_IMAGE_PIXELS = max_image_pixels
+    
+    def get_strip_bands(self, img, rows: int):
+        """ Return horizontal bands of image with tiles to decode each band separately,
+            None if image can't be decoded by strips (compressed single-tile formats)
+        
+            :param img: lazily opened Pillow Image
+            :param rows: max. number of rows per band (band has at least one row of tiles)
+            
+            return list of tuples (top row, bottom row, tiles with extents relative to band) or None
+        """
+        width, height = img.size
+        tiles = img.tile
+        if len(tiles) > 1 and all(tile[0] != 'libtiff' for tile in tiles):
+            # TIFF strips or tiles: bands are made of whole rows of tiles
+            tops = sorted(set(tile[1][1] for tile in tiles))
+            if tops[0] != 0:
+                return None
+            edges = [0]
+            previous = 0
+            for top in tops[1:] + [height]:
+                if top - edges[-1] > rows and previous > edges[-1]:
+                    edges.append(previous) # band would be too high with next row of tiles
+                previous = top
+            edges.append(height)
+            return [
+                (top, bottom, [
+                    self.make_tile(tile[0], (tile[1][0], tile[1][1] - top, tile[1][2], tile[1][3] - top), tile[2], tile[3])
+                    for tile in tiles if top <= tile[1][1] < bottom
+                ])
+                for top, bottom in zip(edges[:-1], edges[1:])
+            ]
+        
+        if len(tiles) != 1 or tiles[0][0] != 'raw' or tiles[0][1] != (0, 0, width, height):
+            return None
+        # single raw tile (uncompressed BMP, PPM, TGA, TIFF): one tile per band at offset of its rows
+        tile = tiles[0]
+        args = (tile[3], 0, 1) if isinstance(tile[3], str) else tuple(tile[3])
+        rawmode, stride, orientation = (args + (0, 1))[:3]
+        if stride == 0 and rawmode.isalpha():
+            stride = len(rawmode) * width # 8 bits per band
+        if stride <= 0 or orientation not in (1, -1):
+            return None
+        bands = []
+        for top in range(0, height, rows):
+            bottom = min(top + rows, height)
+            first_row = top if orientation == 1 else height - bottom # bottom-up images are stored from last row
+            bands.append((top, bottom, [self.make_tile(tile[0], (0, 0, width, bottom - top), tile[2] + first_row * stride, tile[3])]))
+        return bands
+    
+    def make_tile(self, codec: str, extents: tuple, offset: int, args):
+        """ Return Pillow tile descriptor for current Pillow version
+        
+            :param codec: decoder name
+            :param extents: (left, top, right, bottom) of tile in image
+            :param offset: offset of tile data in file, bytes
+            :param args: decoder arguments
+            
+            return ImageFile._Tile (Pillow >= 11) or tuple (older versions)
+        """
+        tile = (codec, extents, offset, args)
+        if hasattr(ImageFile, '_Tile'):
+            return ImageFile._Tile(*tile)
+        return tile
+    
+    def get_full_image(self, img, max_memory: int):
+        """ Return loaded image for formats without strips: JPEG is decoded at reduced scale 
+            if whole image doesn't fit max_memory, other formats up to Image.MAX_IMAGE_PIXELS
+        
+            :param img: lazily opened Pillow Image
+            :param max_memory: memory limit, bytes
+            
+            return Pillow Image (loaded)
+        """
+        width, height = img.size
+        if img.format == 'JPEG':
+            scale = 1
+            while scale < 8 and (width // scale) * (height // scale) * self.CHUNK_ROW_BYTES > max_memory:
+                scale *= 2
+            if scale > 1:
+                img.draft(img.mode, (-(-width // scale), -(-height // scale)))
+        elif Image.MAX_IMAGE_PIXELS and width * height > Image.MAX_IMAGE_PIXELS:
+            raise Exception (f"Image is too large for {img.format} format (can't be read by strips)", width, height, Image.MAX_IMAGE_PIXELS)
+        img.load()
+        return img
+    
+    def add_image_histograms(self, histograms, img, rows: int):
+        """ Add color values of loaded image into running per-layer histograms, strip by strip
+            (only one strip is converted to RGB at once)
+        
+            :param histograms: numpy.array (3, 256) int64, updated in place
+            :param img: loaded Pillow Image
+            :param rows: number of rows per strip
+        """
+        for top in range(0, img.size[1], rows):
+            strip = img.crop((0, top, img.size[0], min(top + rows, img.size[1])))
+            if strip.mode != 'RGB':
+                strip = strip.convert('RGB')
+            self.add_chunk_histograms(histograms, np.asarray(strip))
+    
+    def get_chunk_rows(self, width: int, max_memory: int = None, pixel_bytes: int = None) -> int:
+        """ Return number of image rows per strip for given memory limit 
+        
+            :param width: image width
+            :param max_memory: memory limit for strip buffers, bytes (default CHUNK_MEMORY)
+            :param pixel_bytes: bytes per pixel used by strip buffers (default CHUNK_ROW_BYTES)
+            
+            return int: rows per strip (at least 1)
+        """
+        if max_memory is None:
+            max_memory = self.CHUNK_MEMORY
+        if pixel_bytes is None:
+            pixel_bytes = self.CHUNK_ROW_BYTES
+        
+        return max(1, int(max_memory // (max(width, 1) * pixel_bytes)))
+    
+    def add_chunk_histograms(self, histograms, chunk):
+        """ Add color values of strip into running per-layer histograms 
+        
+            :param histograms: numpy.array (3, 256) of pixel counts, updated in place
+            :param chunk: numpy.array (rows, width, 3), uint8
+        """
+        if len(chunk.shape) != 3 or chunk.shape[2] != 3:
+            raise Exception (f"Invalid shape {chunk.shape}")
+        for i in range(3):
+            histograms[i] += np.bincount(chunk[..., i].ravel(), minlength=256)[:256]
+    
+    def get_histogram_colorvalues(self, histograms, mode: str) -> list:
+        """ Return average (mean or median) value for each color layer from histograms 
+        
+            :param histograms: numpy.array (layers, 256) of pixel counts
+            :param mode: 'mean' or 'median'
+            
+            return list of color layer's average values
+        """
+        if mode not in self.MODES:
+            mode = self.MODES[0] # default == 'mean'
+        
+        values = np.arange(256)
+        out_layers = []
+        for histogram in histograms:
+            count = int(histogram.sum())
+            if count == 0:
+                raise Exception ("Empty image")
+            if mode == self.MODES[1]:
+                layer_value = round(float(self.get_histogram_medians(histogram)))
+            else:
+                layer_value = round(float(np.dot(histogram, values)) / count)
+            out_layers.append(layer_value) if layer_value < 255 else out_layers.append(255)
+        
+        return out_layers
+    
+    def get_stack_info(self, frames, mode: str = 'mean', chunk_size: int = None) -> dict:
+        """ Return average color values (mean & median), brightness & grayscale flags for stack of frames,
+            frames are processed in chunks by vectorized calls (without PIL): 
+            one histogram pass per chunk gives both mean & median values
+        
+            :param frames: numpy.array (N, H, W, 3) uint8 or iterable of frames (H, W, 3)
+            :param mode: 'mean' or 'median' for RGB & brightness
+            :param chunk_size: number of frames processed at once (default STACK_CHUNK)
+            
+            return dict of numpy.arrays:
+                mean: (N, 3) mean R,G,B values, same as get_average_colorvalues(..., 'mean') for every frame
+                median: (N, 3) median R,G,B values, same as get_average_colorvalues(..., 'median') for every frame
+                RGB: (N, 3) average R,G,B values of selected mode
+                brightness: (N) brightness in [0..100] range (selected mode), same as get_average_brightness
+                grayscale: (N) True for frames with equal R,G,B layers (night/grayscale mode)
+        """
+        if mode not in self.MODES:
+            mode = self.MODES[0] # default == 'mean'
+        
+        means = []
+        medians = []
+        grayscale = []
+        for chunk in self.iter_stack_chunks(frames, chunk_size):
+            histograms = self.get_stack_histograms(chunk)
+            means.append(self.get_histogram_means(histograms))
+            medians.append(self.get_histogram_medians(histograms))
+            grayscale.append(self.get_stack_grayscale(chunk, histograms=histograms))
+        
+        if not means:
+            empty = np.zeros((0, 3), dtype=int)
+            return {'mean': empty, 'median': empty, 'RGB': empty, 'brightness': np.zeros(0, dtype=int), 'grayscale': np.zeros(0, dtype=bool)}
+        
+        values = {
+            self.MODES[0]: np.minimum(np.round(np.concatenate(means)), 255).astype(int),
+            self.MODES[1]: np.minimum(np.round(np.concatenate(medians)), 255).astype(int),
+        }
+        return {
+            'mean': values[self.MODES[0]],
+            'median': values[self.MODES[1]],
+            'RGB': values[mode],
+            'brightness': (values[mode].max(axis=1) * 100 / 255).astype(int),
+            'grayscale': np.concatenate(grayscale),
+        }
+    
+    def get_stack_colorvalues(self, frames, mode: str):
+        """ Return average (mean or median) color values for each frame of stack 
+        
+            :param frames: numpy.array (N, H, W, 3)
+            :param mode: 'mean' or 'median'
+            
+            return numpy.array (N, 3) of int
+        """
+        if len(frames.shape) != 4 or frames.shape[3] != 3:
+            raise Exception (f"Invalid shape {frames.shape}")
+        if mode not in self.MODES:
+            mode = self.MODES[0] # default == 'mean'
+        
+        n, height, width = frames.shape[:3]
+        if mode == self.MODES[1]:
+            values = self.get_histogram_medians(self.get_stack_histograms(frames))
+        else:
+            # sum rows first (contiguous, uint32 is enough for < 16M rows), then columns of each layer
+            sums = frames.reshape(n, height, width * 3).sum(axis=1, dtype=np.uint32)
+            sums = sums.reshape(n, width, 3).sum(axis=1, dtype=np.uint64)
+            values = sums / (height * width)
+        
+        return np.minimum(np.round(values), 255).astype(int)
+    
+    def get_stack_histograms(self, frames):
+        """ Return histograms of color values for each frame & color layer of stack, counted in place 
+            by cv2.calcHist (no copies of color layers, ~3x faster than numpy.bincount of layer copies).
+            Frames with 2^24 pixels or more are counted by numpy.bincount (calcHist counts are float32).
+        
+            :param frames: numpy.array (N, H, W, 3) uint8 (frames may be views, e.g. regions of interest)
+            
+            return numpy.array (N, 3, 256) of pixel counts
+        """
+        if len(frames.shape) != 4 or frames.shape[3] != 3:
+            raise Exception (f"Invalid shape {frames.shape}")
+        n, height, width = frames.shape[:3]
+        histograms = np.empty((n, 3, 256), dtype=np.int64)
+        if height * width < self.STACK_EXACT_COUNT:
+            import cv2 # imported on first use, image files are analyzed without OpenCV
+            for i in range(n):
+                for j in range(3):
+                    histograms[i, j] = cv2.calcHist([frames[i]], [j], None, [256], [0, 256]).ravel()
+        else:
+            for i in range(n):
+                for j in range(3):
+                    histograms[i, j] = np.bincount(frames[i, ..., j].ravel(), minlength=256)[:256]
+        
+        return histograms
+    
+    def get_histogram_means(self, histograms):
+        """ Return mean values from histograms, same as mean of pixel values
+        
+            :param histograms: numpy.array (..., 256) of pixel counts
+            
+            return numpy.array (...) of float
+        """
+        return (histograms @ np.arange(256)) / histograms.sum(axis=-1)
+    
+    def get_histogram_medians(self, histograms):
+        """ Return median values from histograms, same as numpy.median of pixel values: 
+            middle value, or mean of two middle values
+        
+            :param histograms: numpy.array (..., 256) of pixel counts
+            
+            return numpy.array (...) of float
+        """
+        cumsum = np.cumsum(histograms, axis=-1)
+        count = cumsum[..., -1:]
+        lower = (cumsum <= (count - 1) // 2).sum(axis=-1)
+        upper = (cumsum <= count // 2).sum(axis=-1)
+        
+        return (lower + upper) / 2
+    
+    def get_stack_grayscale(self, frames, sample_step: int = 8, histograms = None):
+        """ Return grayscale flags (all color layers are equal) for each frame of stack.
+            Frames are checked by sample of pixels (& by histograms of color layers, if given) first, 
+            whole frames are compared only if they can be grayscale
+            (candidates are compared at once, split only to keep buffers under STACK_BUFFER_ITEMS).
+        
+            :param frames: numpy.array (N, H, W, 3)
+            :param sample_step: step between sampled pixels (rows & columns)
+            :param histograms: numpy.array (N, 3, 256) histograms of frames (see get_stack_histograms)
+            
+            return numpy.array (N) of bool
+        """
+        sample = frames[:, ::sample_step, ::sample_step]
+        grayscale = ((sample[..., 0] == sample[..., 1]) & (sample[..., 1] == sample[..., 2])).reshape(len(frames), -1).all(axis=1)
+        if histograms is not None:
+            # equal color layers have equal histograms
+            grayscale &= (histograms[:, 0] == histograms[:, 1]).all(axis=1) & (histograms[:, 1] == histograms[:, 2]).all(axis=1)
+        candidates = np.flatnonzero(grayscale)
+        step = max(1, self.STACK_BUFFER_ITEMS // max(frames[0].size, 1)) if len(frames) else 1
+        for i in range(0, len(candidates), step):
+            part = frames[candidates[i:i + step]]
+            equal = (part[..., 0] == part[..., 1]) & (part[..., 1] == part[..., 2])
+            grayscale[candidates[i:i + step]] = equal.reshape(len(part), -1).all(axis=1)
+        
+        return grayscale
+    
+    def iter_stack_chunks(self, frames, chunk_size: int = None):
+        """ Return iterator over stack of frames in chunks 
+        
+            :param frames: numpy.array (N, H, W, 3) (chunks are views) or iterable of frames (H, W, 3)
+            :param chunk_size: number of frames in chunk (default STACK_CHUNK)
+            
+            return iterator of numpy.arrays (n, H, W, 3)
+        """
+        if chunk_size is None:
+            chunk_size = self.STACK_CHUNK
+        
+        if isinstance(frames, np.ndarray):
+            for i in range(0, len(frames), chunk_size):
+                yield frames[i:i + chunk_size]
+            return
+        
+        chunk = []
+        for frame in frames:
+            chunk.append(frame)
+            if len(chunk) == chunk_size:
+                yield np.stack(chunk)
+                chunk = []
+        if chunk:
+            yield np.stack(chunk)
+    
+    def get_masked_colorvalues(self, image, mode: str, low: int = None, high: int = None, max_memory: int = None) -> tuple:
+        """ Return average value for each color layer, excluding clipped (any color value >= high) 
+            & underexposed (all color values <= low) pixels.
+            Frame is read by strips into histograms of color values by pixel exposure (max. color value of pixel),
+            thresholds are applied to histograms, so no boolean masks are allocated.
+        
+            :param image: numpy.array (H, W, 3)
+            :param mode: 'mean' or 'median'
+            :param low: underexposure threshold (default MASK_LOW)
+            :param high: clipping threshold (default MASK_HIGH)
+            :param max_memory: memory limit for strip buffers, bytes (default CHUNK_MEMORY)
+            
+            return tuple(
+                list of color layer's average values (of all pixels if all pixels are excluded)
+                float: fraction of excluded pixels (0..1)
+            )
+        """
+        if len(image.shape) != 3 or image.shape[2] != 3:
+            raise Exception (f"Invalid shape {image.shape}")
+        low = self.MASK_LOW if low is None else low
+        high = self.MASK_HIGH if high is None else high
+        
+        histograms = np.zeros((3, 256, 256), dtype=np.int64) # [layer, pixel exposure, color value]
+        rows = self.get_chunk_rows(image.shape[1], max_memory, self.MASK_ROW_BYTES)
+        for top in range(0, image.shape[0], rows):
+            self.add_masked_histograms(histograms, image[top:top + rows])
+        
+        total = int(histograms[0].sum())
+        if total == 0:
+            raise Exception ("Empty image")
+        kept = histograms[:, max(low + 1, 0):max(high, 0)].sum(axis=1)
+        kept_count = int(kept[0].sum())
+        if kept_count == 0:
+            return self.get_histogram_colorvalues(histograms.sum(axis=1), mode), 1.0
+        
+        return self.get_histogram_colorvalues(kept, mode), 1 - kept_count / total
+    
+    def add_masked_histograms(self, histograms, chunk):
+        """ Add color values of strip into running histograms by pixel exposure 
+        
+            :param histograms: numpy.array (3, 256, 256) of pixel counts [layer, max. color value of pixel, color value], updated in place
+            :param chunk: numpy.array (rows, width, 3), uint8
+        """
+        exposure = (chunk.max(axis=2).astype(np.uint16) << 8).ravel()
+        for i in range(3):
+            histograms[i] += np.bincount(exposure | chunk[..., i].ravel(), minlength=65536)[:65536].reshape(256, 256)
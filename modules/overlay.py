@@ -0,0 +1,129 @@
+##
+## ColorTempFromRGB FrameOverlay module
+## - Draw info banner (text lines & color swatches) on frames with cached rendering
+##
+## https://github.com/greentracery/ColorTempFromRGB
+##
+
+import cv2
+import numpy as np
+
+class FrameOverlay():
+    """ Info banner in top left corner of frame: text lines & color swatches are rendered
+        into cached layers with alpha masks only when they change, every frame gets only blend of small banner bands.
+        
+        property: LINE_HEIGHT: distance between text baselines, pixels
+        property: SWATCH_SIZE: size of color swatch, pixels
+        
+        method: set_lines: Set text lines
+        method: set_swatches: Set colors of swatches
+        method: apply: Draw banner on frame (in place), render changed lines & swatches first
+        method: render_line: Render text line into cached color layer & alpha mask of its band
+        method: render_swatches: Render color swatches into cached opaque layer
+        method: reset: Clear cached banner for new frame width
+    """
+    LINE_HEIGHT = 25
+    SWATCH_SIZE = 40
+    MARGIN = 10
+    
+    def __init__(self, font = cv2.FONT_HERSHEY_COMPLEX, fontsize: float = 0.6, color = (0, 250, 0), lines: int = 4):
+        """
+            :param font: OpenCV font
+            :param fontsize: font scale
+            :param color: color of text & swatch border
+            :param lines: number of text lines
+        """
+        self.font = font
+        self.fontsize = fontsize
+        self.color = color
+        self.line_count = lines
+        self.lines = [None] * lines
+        self.swatches = None
+        self.reset(0)
+    
+    def reset(self, width: int):
+        """ Clear cached banner for new frame width (lines & swatches are rendered again on next apply)
+            
+            :param width: frame width, pixels
+        """
+        self.width = width
+        self.rendered_lines = [None] * self.line_count
+        self.rendered_swatches = None
+        self.parts = {} # top row, color layer, alpha weights of every rendered line & swatches
+    
+    def set_lines(self, lines: list):
+        """ Set text lines (rendered on apply, only changed lines)
+            
+            :param lines: list of strings
+        """
+        for i, text in enumerate(lines[:self.line_count]):
+            self.lines[i] = text
+    
+    def set_swatches(self, colors: list):
+        """ Set colors of swatches (rendered on apply, only if changed)
+            
+            :param colors: list of (R, G, B) tuples
+        """
+        self.swatches = [tuple(int(v) for v in color) for color in colors]
+    
+    def render_line(self, i: int):
+        """ Render text line into cached color layer & alpha mask of its band
+            
+            :param i: line index
+        """
+        text = self.lines[i]
+        self.rendered_lines[i] = text
+        if not text:
+            self.parts.pop(i, None)
+            return
+        baseline = (i + 1) * self.LINE_HEIGHT
+        top = baseline - self.LINE_HEIGHT + 5
+        (text_width, text_height), _ = cv2.getTextSize(text, self.font, self.fontsize, 1)
+        width = min(self.MARGIN + text_width + 2, self.width)
+        # text is rendered once as coverage (alpha) of text color, anti-aliased edges are blended on apply
+        alpha = np.zeros((self.LINE_HEIGHT, width), dtype=np.uint8)
+        cv2.putText(alpha, text, (self.MARGIN, baseline - top), self.font, self.fontsize, 255, 1)
+        layer = np.empty((self.LINE_HEIGHT, width, 3), dtype=np.uint8)
+        layer[:] = self.color
+        weights = alpha.astype(np.float32) / 255
+        self.parts[i] = (top, layer, weights, 1 - weights)
+    
+    def render_swatches(self):
+        """ Render color swatches into cached opaque layer """
+        colors = self.swatches
+        self.rendered_swatches = colors
+        top = self.line_count * self.LINE_HEIGHT + 2 * self.MARGIN
+        right = min(self.MARGIN + self.SWATCH_SIZE * len(colors), self.width - 1)
+        layer = np.zeros((self.SWATCH_SIZE + 1, right + 1, 3), dtype=np.uint8)
+        for i, color in enumerate(colors):
+            left = self.MARGIN + self.SWATCH_SIZE * i
+            cv2.rectangle(layer, (left, 0), (left + self.SWATCH_SIZE, self.SWATCH_SIZE), color, -1)
+        cv2.rectangle(layer, (self.MARGIN, 0), (self.MARGIN + self.SWATCH_SIZE * len(colors), self.SWATCH_SIZE), self.color, 1)
+        self.parts['swatches'] = (top, layer[:, self.MARGIN:], None, None)
+    
+    def apply(self, frame):
+        """ Draw banner on frame (in place), render changed lines & swatches first
+            
+            :param frame: frame (numpy array, H x W x 3, uint8)
+            
+            return frame (numpy array)
+        """
+        if frame.shape[1] != self.width:
+            self.reset(frame.shape[1]) # new frame size: render all lines & swatches again
+        for i in range(self.line_count):
+            if self.lines[i] != self.rendered_lines[i]:
+                self.render_line(i)
+        if self.swatches and self.swatches != self.rendered_swatches:
+            self.render_swatches()
+        
+        for key, (top, layer, weights, inv_weights) in self.parts.items():
+            height = min(layer.shape[0], frame.shape[0] - top) # bottom of banner may be cut by frame
+            if height <= 0:
+                continue
+            left = self.MARGIN if key == 'swatches' else 0
+            area = frame[top:top + height, left:left + layer.shape[1]]
+            if weights is None:
+                area[:] = layer[:height] # opaque swatches
+            else:
+                cv2.blendLinear(layer[:height], area, weights[:height], inv_weights[:height], dst=area)
+        return frame
@@ -0,0 +1,177 @@
+##
+## ColorTempFromRGB Planckian model generator
+## - Calculate blackbody colors for any temperature range & step
+##   from Planck's law & CIE color matching functions
+##
+## https://github.com/greentracery/ColorTempFromRGB
+##
+## Follows Mitchell Charity's method for bbr_color.txt:
+##  spectrum -> XYZ -> xy -> linear sRGB (D65), desaturated into gamut, normalized to max. component
+## See also http://www.vendian.org/mncharity/dir3/blackbody/
+##
+
+import os
+import numpy as np
+
+class PlanckModelGenerator():
+    """ Generate blackbody radiation data model (temperature, chromaticity, RGB)
+        by integrating Planck's law against tabulated CIE color matching functions
+        
+        property: cmf_file: filename of CIE color matching functions table
+        property: CMFS: color matching functions ('2deg' - CIE 1931 2 degree, '10deg' - CIE 1964 10 degree)
+        
+        method: get_cmf: Return wavelengths & color matching functions table
+        method: planck: Return spectral radiance for wavelengths & temperatures
+        method: get_chromaticity: Return chromaticity coordinates (x, y) for temperatures
+        method: xy_to_rgbn: Return normalized linear R,G,B (0-1) for chromaticity coordinates
+        method: rgbn_to_rgb: Return R,G,B (0-255, sRGB gamma) from normalized linear values
+        method: generate: Return model for temperature range & step
+        method: get_model: Return model from cache file, generate & save it if not cached
+        method: get_cache_file: Return filename of cached model
+    """
+    cmf_file = r'cie_cmf.txt'
+    CMFS = ('2deg', '10deg')
+    C2 = 1.4387769e7 # second radiation constant, nm * K
+    # XYZ -> linear sRGB (sRGB primaries, D65 white point)
+    XYZ_TO_RGB = np.array([
+        [ 3.2406, -1.5372, -0.4986],
+        [-0.9689,  1.8758,  0.0415],
+        [ 0.0557, -0.2040,  1.0570],
+    ])
+    
+    def __init__(self, cache_dir: str = None):
+        """
+            :param cache_dir: directory for cached models (default: data directory of module)
+        """
+        self.data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+        self.cache_dir = cache_dir if cache_dir is not None else self.data_dir
+        self.cmf_table = None
+    
+    def get_cmf(self, cmf: str = '10deg') -> tuple:
+        """ Return wavelengths & color matching functions table
+            
+            :param cmf: Color matching function ('10deg', '2deg')
+            
+            return tuple(
+                wavelengths: numpy.array (N), nm
+                xyz: numpy.array (N, 3)
+            )
+        """
+        if cmf not in self.CMFS:
+            raise ValueError("Unknown color matching function", cmf)
+        if self.cmf_table is None:
+            self.cmf_table = np.loadtxt(os.path.join(self.data_dir, self.cmf_file), comments='#')
+        
+        cols = slice(1, 4) if cmf == self.CMFS[0] else slice(4, 7)
+        return self.cmf_table[:, 0], self.cmf_table[:, cols]
+    
+    def planck(self, wavelengths, temps):
+        """ Return spectral radiance (semi-arbitrary units) for wavelengths & temperatures
+            
+            :param wavelengths: numpy.array (N), nm
+            :param temps: numpy.array (T), K
+            
+            return numpy.array (T, N)
+        """
+        wl = np.asarray(wavelengths, dtype=float)[np.newaxis, :]
+        t = np.asarray(temps, dtype=float)[:, np.newaxis]
+        
+        return 1 / (wl ** 5 * np.expm1(self.C2 / (wl * t)))
+    
+    def get_chromaticity(self, temps, cmf: str = '10deg'):
+        """ Return chromaticity coordinates (x, y) for temperatures
+            
+            :param temps: numpy.array (T), K
+            :param cmf: Color matching function ('10deg', '2deg')
+            
+            return numpy.array (T, 2)
+        """
+        wavelengths, xyz_cmf = self.get_cmf(cmf)
+        XYZ = self.planck(wavelengths, temps) @ xyz_cmf # same constant step for all wavelengths
+        
+        return XYZ[:, :2] / XYZ.sum(axis=1, keepdims=True)
+    
+    def xy_to_rgbn(self, xy):
+        """ Return normalized linear R,G,B (0-1) for chromaticity coordinates
+            
+            :param xy: numpy.array (T, 2)
+            
+            return numpy.array (T, 3)
+        """
+        xyz = np.column_stack((xy, 1 - xy.sum(axis=1)))
+        rgb = xyz @ self.XYZ_TO_RGB.T
+        # map to gamut: desaturate (add white) until no component is negative
+        rgb = rgb - np.minimum(rgb.min(axis=1, keepdims=True), 0)
+        
+        return rgb / rgb.max(axis=1, keepdims=True)
+    
+    def rgbn_to_rgb(self, rgbn):
+        """ Return R,G,B (0-255, sRGB gamma correction) from normalized linear values
+            
+            :param rgbn: numpy.array (T, 3)
+            
+            return numpy.array (T, 3) of int
+        """
+        srgb = np.where(rgbn <= 0.0031308, 12.92 * rgbn, 1.055 * np.power(rgbn, 1 / 2.4) - 0.055)
+        
+        return np.round(srgb * 255).astype(int)
+    
+    def generate(self, t_min: int = 1000, t_max: int = 40000, step: int = 100, cmf: str = '10deg') -> dict:
+        """ Return model for temperature range & step
+            
+            :param t_min: min. temperature, K
+            :param t_max: max. temperature, K
+            :param step: temperature step, K
+            :param cmf: Color matching function ('10deg', '2deg')
+            
+            return dict of numpy.arrays:
+                K: temperatures (T)
+                xy: chromaticity coordinates (T, 2)
+                rgbn: R,G,B normalized (T, 3), rounded to 4 digits like bbr_color.txt
+                rgb: R,G,B 0-255 (T, 3)
+        """
+        if step <= 0 or t_min <= 0 or t_max < t_min:
+            raise ValueError("Invalid temperature range", t_min, t_max, step)
+        
+        temps = np.arange(t_min, t_max + 1, step)
+        xy = self.get_chromaticity(temps, cmf)
+        rgbn = self.xy_to_rgbn(xy)
+        
+        return {
+            'K': temps,
+            'xy': xy.round(4),
+            'rgbn': rgbn.round(4),
+            'rgb': self.rgbn_to_rgb(rgbn),
+        }
+    
+    def get_cache_file(self, t_min: int, t_max: int, step: int, cmf: str) -> str:
+        """ Return filename of cached model """
+        return os.path.join(self.cache_dir, f'bbr_{cmf}_{t_min}_{t_max}_{step}.npz')
+    
+    def get_model(self, t_min: int = 1000, t_max: int = 40000, step: int = 100, cmf: str = '10deg') -> dict:
+        """ Return model from cache file, generate & save it if not cached
+            
+            :param t_min: min. temperature, K
+            :param t_max: max. temperature, K
+            :param step: temperature step, K
+            :param cmf: Color matching function ('10deg', '2deg')
+            
+            return dict of numpy.arrays (see generate)
+        """
+        cache_file = self.get_cache_file(t_min, t_max, step, cmf)
+        if os.path.exists(cache_file):
+            with np.load(cache_file) as data:
+                return {key: data[key] for key in data.files}
+        
+        model = self.generate(t_min, t_max, step, cmf)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # write to temporary file first, so other processes never read incomplete model
+            tmp_file = f'{cache_file}.{os.getpid()}.tmp'
+            with open(tmp_file, 'wb') as file:
+                np.savez(file, **model)
+            os.replace(tmp_file, cache_file)
+        except OSError:
+            pass # read-only location, model is generated again next time
+        
+        return model
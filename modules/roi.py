@@ -0,0 +1,82 @@
+##
+## ColorTempFromRGB RegionOfInterest module
+## - Rectangular regions of frame for analysis
+##
+## https://github.com/greentracery/ColorTempFromRGB
+##
+
+class RegionOfInterest():
+    """ Rectangular region of frame (frame coordinates, pixels)
+        
+        property: x, y: top left corner
+        property: width, height: size of region
+        
+        method: from_string: Return region from "x,y,width,height" string
+        method: from_corners: Return region from two opposite corners
+        method: clip: Return region clipped by frame size
+        method: get_view: Return region of frame as numpy view (without copy)
+    """
+    
+    def __init__(self, x: int, y: int, width: int, height: int):
+        """
+            :param x: left column (region is cut by frame edge if x < 0)
+            :param y: top row (region is cut by frame edge if y < 0)
+            :param width: width, pixels
+            :param height: height, pixels
+        """
+        x, y, width, height = int(x), int(y), int(width), int(height)
+        if x < 0:
+            width += x
+        if y < 0:
+            height += y
+        if width <= 0 or height <= 0:
+            raise ValueError("Invalid region size", width, height)
+        self.x = max(x, 0)
+        self.y = max(y, 0)
+        self.width = width
+        self.height = height
+    
+    def __repr__(self):
+        return f"{self.x},{self.y},{self.width},{self.height}"
+    
+    @classmethod
+    def from_string(cls, text: str):
+        """ Return region from "x,y,width,height" string
+            
+            :param text: "x,y,width,height"
+            
+            return RegionOfInterest
+        """
+        values = [int(value) for value in text.replace(' ', '').split(',')]
+        if len(values) != 4:
+            raise ValueError("Region must be set as x,y,width,height", text)
+        return cls(*values)
+    
+    @classmethod
+    def from_corners(cls, x0: int, y0: int, x1: int, y1: int):
+        """ Return region from two opposite corners
+            
+            return RegionOfInterest
+        """
+        return cls(min(x0, x1), min(y0, y1), abs(x1 - x0), abs(y1 - y0))
+    
+    def clip(self, width: int, height: int):
+        """ Return region clipped by frame size
+            
+            :param width: frame width, pixels
+            :param height: frame height, pixels
+            
+            return RegionOfInterest or None (if region is outside of frame)
+        """
+        if self.x >= width or self.y >= height:
+            return None
+        return RegionOfInterest(self.x, self.y, min(self.width, width - self.x), min(self.height, height - self.y))
+    
+    def get_view(self, frame):
+        """ Return region of frame as numpy view (without copy), clipped by frame size
+            
+            :param frame: frame (numpy array, H x W x 3)
+            
+            return numpy.array (may be empty if region is outside of frame)
+        """
+        return frame[self.y:self.y + self.height, self.x:self.x + self.width]
@@ -0,0 +1,116 @@
+##
+## ColorTempFromRGB AdaptiveScheduler module
+## - Decide when next frame should be analyzed
+##
+## https://github.com/greentracery/ColorTempFromRGB
+##
+
+import time
+
+class AdaptiveScheduler():
+    """ Analysis scheduler for one video stream: analyze more often while color temperature
+        or brightness is changing, back off to slow heartbeat while scene is stable,
+        never spend more than CPU budget on analysis.
+        With min_interval == max_interval works as fixed pause.
+        
+        property: interval: current pause between analyses, sec.
+        property: decisions: counters of scheduler decisions (faster, slower, budget)
+        
+        method: due: Return True if next analysis is due
+        method: record: Record results & cost of analysis, set next pause
+        method: get_mired: Return color temperature in mireds (1e6 / K)
+        method: metrics: Return scheduler state & counters
+    """
+    
+    def __init__(self, interval: float = 3, min_interval: float = None, max_interval: float = None,
+                 cpu_budget: float = 0.25, mired_threshold: float = 5, brightness_threshold: int = 2,
+                 speedup: float = 0.5, backoff: float = 1.5):
+        """
+            :param interval: initial pause between analyses, sec.
+            :param min_interval: min. pause while scene is changing, sec. (default interval)
+            :param max_interval: max. pause (heartbeat) while scene is stable, sec. (default interval)
+            :param cpu_budget: max. share of time (0..1 of one CPU core) spent on analysis of stream
+            :param mired_threshold: color temperature change to treat scene as changing, mireds
+            :param brightness_threshold: brightness change (0..100) to treat scene as changing
+            :param speedup: pause multiplier for changing scene (< 1)
+            :param backoff: pause multiplier for stable scene (> 1)
+        """
+        self.min_interval = interval if min_interval is None else min_interval
+        self.max_interval = interval if max_interval is None else max_interval
+        self.interval = min(max(interval, self.min_interval), self.max_interval)
+        self.cpu_budget = cpu_budget
+        self.mired_threshold = mired_threshold
+        self.brightness_threshold = brightness_threshold
+        self.speedup = speedup
+        self.backoff = backoff
+        
+        self.next_time = 0 # first analysis at once
+        self.last_mired = None
+        self.last_brightness = None
+        self.avg_cost = 0
+        self.analyses = 0
+        self.started = time.monotonic()
+        self.decisions = {'faster': 0, 'slower': 0, 'budget': 0}
+    
+    def due(self, now: float = None) -> bool:
+        """ Return True if next analysis is due
+            
+            :param now: time.monotonic() value (default current)
+        """
+        return (time.monotonic() if now is None else now) >= self.next_time
+    
+    def get_mired(self, color_temp) -> float:
+        """ Return color temperature in mireds (1e6 / K), equal steps are equally visible """
+        return 1e6 / color_temp if color_temp else 0
+    
+    def record(self, color_temp: int, brightness: int, cost: float, now: float = None) -> float:
+        """ Record results & cost of analysis, set next pause
+            
+            :param color_temp: measured color temperature (K)
+            :param brightness: measured brightness (0..100)
+            :param cost: time spent on analysis, sec.
+            :param now: time.monotonic() value (default current)
+            
+            return float: pause before next analysis, sec.
+        """
+        now = time.monotonic() if now is None else now
+        mired = self.get_mired(color_temp)
+        self.avg_cost = cost if self.analyses == 0 else 0.8 * self.avg_cost + 0.2 * cost
+        self.analyses += 1
+        
+        if self.last_mired is not None:
+            changing = (abs(mired - self.last_mired) >= self.mired_threshold
+                        or abs(brightness - self.last_brightness) >= self.brightness_threshold)
+            if changing and self.interval > self.min_interval:
+                self.interval = max(self.min_interval, self.interval * self.speedup)
+                self.decisions['faster'] += 1
+            elif not changing and self.interval < self.max_interval:
+                self.interval = min(self.max_interval, self.interval * self.backoff)
+                self.decisions['slower'] += 1
+        self.last_mired = mired
+        self.last_brightness = brightness
+        
+        interval = self.interval
+        if self.cpu_budget > 0 and self.avg_cost / self.cpu_budget > interval:
+            interval = self.avg_cost / self.cpu_budget # analysis is too expensive for this rate
+            self.decisions['budget'] += 1
+        
+        self.next_time = now + interval
+        return interval
+    
+    def metrics(self) -> dict:
+        """ Return scheduler state & counters
+            
+            return dict: interval, rate (analyses per sec.), effective_rate, avg_cost, cpu_share, analyses, decisions
+        """
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        interval = max(self.interval, self.avg_cost / self.cpu_budget if self.cpu_budget > 0 else 0)
+        return {
+            'interval': round(interval, 2),
+            'rate': round(1 / interval, 3) if interval > 0 else None,
+            'effective_rate': round(self.analyses / elapsed, 3),
+            'avg_cost': round(self.avg_cost, 4),
+            'cpu_share': round(self.avg_cost * self.analyses / elapsed, 4),
+            'analyses': self.analyses,
+            'decisions': dict(self.decisions),
+        }
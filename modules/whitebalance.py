@@ -0,0 +1,92 @@
+##
+## ColorTempFromRGB WhiteBalance module
+## - Neutralize measured color temperature of frames by per-channel gains
+##
+## https://github.com/greentracery/ColorTempFromRGB
+##
+
+import cv2
+import numpy as np
+
+class WhiteBalance():
+    """ White balance correction: per-channel gains from blackbody model color of measured temperature,
+        applied to frames by 256-entry lookup tables (one pass, no float conversion of frame).
+        Gains are applied to R,G,B values the same way as they are compared with model (see ColorTempModel),
+        so corrected frame is measured as target color.
+        
+        property: temp_K: color temperature (K) of current lookup tables, None if correction is off
+        property: gains: current R,G,B gains
+        property: max_gain: max. gain (min. gain is 1 / max_gain)
+        
+        method: set_temperature: Set measured color temperature, rebuild lookup tables if it was changed
+        method: get_gains: Return R,G,B gains for color temperature
+        method: build_lut: Return lookup table for R,G,B gains
+        method: apply: Return frame with white balance correction
+    """
+    
+    def __init__(self, ct, target_K: int = None, cmf: str = '10deg', max_gain: float = 4.0):
+        """
+            :param ct: ColorTempModel
+            :param target_K: target color temperature (K), None for neutral gray (R = G = B)
+            :param cmf: Color matching function ('10deg', '2deg')
+            :param max_gain: max. gain (min. gain is 1 / max_gain)
+        """
+        self.ct = ct
+        self.cmf = cmf
+        self.max_gain = max_gain
+        if target_K is None:
+            self.target = np.ones(3)
+        else:
+            self.target = np.array(self.ct.getRGBNFromColorTemp(target_K, cmf))
+        self.temp_K = None
+        self.gains = np.ones(3)
+        self.lut = self.build_lut(self.gains)
+    
+    def set_temperature(self, temp_K: int):
+        """ Set measured color temperature, rebuild lookup tables if it was changed
+            
+            :param temp_K: color temperature (K), None to switch correction off
+        """
+        if temp_K == self.temp_K:
+            return
+        self.temp_K = temp_K
+        self.gains = self.get_gains(temp_K) if temp_K is not None else np.ones(3)
+        self.lut = self.build_lut(self.gains)
+    
+    def get_gains(self, temp_K: int):
+        """ Return R,G,B gains for color temperature (green gain is 1)
+            
+            :param temp_K: color temperature (K)
+            
+            return numpy.array (3)
+        """
+        rgbn = np.array(self.ct.getRGBNFromColorTemp(temp_K, self.cmf))
+        gains = self.target / np.maximum(rgbn, 1e-4)
+        gains = gains / gains[1]
+        
+        return np.clip(gains, 1 / self.max_gain, self.max_gain)
+    
+    def build_lut(self, gains):
+        """ Return lookup table for R,G,B gains
+            
+            :param gains: R,G,B gains
+            
+            return numpy.array (256, 1, 3) uint8 (cv2.LUT format for 3-channel frames)
+        """
+        values = np.arange(256, dtype=float)[:, np.newaxis] * np.asarray(gains, dtype=float)[np.newaxis, :]
+        
+        return np.clip(np.round(values), 0, 255).astype(np.uint8).reshape(256, 1, 3)
+    
+    def apply(self, frame, inplace: bool = False):
+        """ Return frame with white balance correction
+            
+            :param frame: frame (numpy array, H x W x 3, uint8, R,G,B order)
+            :param inplace: write result into frame
+            
+            return frame (numpy array)
+        """
+        if self.temp_K is None:
+            return frame
+        if inplace:
+            return cv2.LUT(frame, self.lut, dst=frame)
+        return cv2.LUT(frame, self.lut)